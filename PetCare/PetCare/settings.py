@@ -226,3 +226,84 @@ ROBOFLOW_API_KEY = os.environ.get('ROBOFLOW_API_KEY')
 ROBOFLOW_MODEL_ENDPOINT = os.environ.get('ROBOFLOW_MODEL_ENDPOINT')
 ROBOFLOW_API_URL = "https://detect.roboflow.com/"
 
+# الحد الأقصى لعدد الحيوانات في طلب تشخيص دفعة واحد (/api/diagnose/symptoms/)
+DIAGNOSIS_MAX_BATCH_SIZE = int(os.environ.get('DIAGNOSIS_MAX_BATCH_SIZE', 100))
+
+# ذاكرة LRU لنتائج التشخيص بالأعراض لكل إصدار نموذج (عدد تركيبات الأعراض المحفوظة، 0 لتعطيلها)
+DIAGNOSIS_CACHE_SIZE = int(os.environ.get('DIAGNOSIS_CACHE_SIZE', 4096))
+# أقل مدة (بالثواني) بين فحصين لملف model/CURRENT (التبديل إلى إصدار نموذج جديد دون إعادة تشغيل)
+DIAGNOSIS_MODEL_CHECK_INTERVAL = float(os.environ.get('DIAGNOSIS_MODEL_CHECK_INTERVAL', 2))
+# تحميل مصفوفات نموذج التشخيص عبر memory-map لمشاركتها بين عمليات gunicorn
+DIAGNOSIS_MODEL_MMAP = os.environ.get('DIAGNOSIS_MODEL_MMAP') == 'True'
+# مدة (بالثواني) الاحتفاظ بمقبض نموذج Roboflow في ذاكرة العملية قبل إعادة حله عبر SDK
+ROBOFLOW_MODEL_CACHE_TTL = int(os.environ.get('ROBOFLOW_MODEL_CACHE_TTL', 3600))
+# مهلة (بالثواني) طلب الاستدلال إلى Roboflow Hosted API
+ROBOFLOW_INFERENCE_TIMEOUT = int(os.environ.get('ROBOFLOW_INFERENCE_TIMEOUT', 30))
+
+# المعالجة المسبقة لصور التشخيص قبل إرسالها إلى Roboflow: تصغير إلى دقة إدخال النموذج
+# (من إعدادات إصدار Roboflow، وإلا DIAGNOSIS_IMAGE_MAX_SIZE) وإعادة ترميز JPEG بدون EXIF
+DIAGNOSIS_IMAGE_PREPROCESS = os.environ.get('DIAGNOSIS_IMAGE_PREPROCESS', 'True') == 'True'
+DIAGNOSIS_IMAGE_MAX_SIZE = int(os.environ.get('DIAGNOSIS_IMAGE_MAX_SIZE', 640))
+DIAGNOSIS_IMAGE_JPEG_QUALITY = int(os.environ.get('DIAGNOSIS_IMAGE_JPEG_QUALITY', 85))
+
+# نموذج الكشف للتشخيص بالصور: 'roboflow' أو 'local' (بديل محلي بدون شبكة للاختبارات والتطوير)
+DIAGNOSIS_IMAGE_BACKEND = os.environ.get('DIAGNOSIS_IMAGE_BACKEND', 'roboflow')
+# عدد خيوط مجمّع مهام التشخيص بالصور غير المتزامنة في كل عملية
+DIAGNOSIS_JOB_WORKERS = int(os.environ.get('DIAGNOSIS_JOB_WORKERS', 4))
+
+# ذاكرة نتائج التشخيص بالصور، مفتاحها البصمة الإدراكية (dHash) للصورة بعد المعالجة المسبقة:
+# عدد النتائج المحفوظة (0 لتعطيلها)، مدة صلاحيتها بالثواني، وأقصى مسافة Hamming (من 64 بت)
+# لاعتبار صورتين متطابقتين (0 = تطابق البصمة تماماً). الافتراضي 0: الذاكرة مشتركة بين كل المستخدمين،
+# وصورة قطة أخرى على مسافة بتات قليلة يجب ألا تأخذ تشخيص غيرها دون استدلال
+DIAGNOSIS_IMAGE_CACHE_SIZE = int(os.environ.get('DIAGNOSIS_IMAGE_CACHE_SIZE', 1024))
+DIAGNOSIS_IMAGE_CACHE_TTL = int(os.environ.get('DIAGNOSIS_IMAGE_CACHE_TTL', 3600))
+DIAGNOSIS_IMAGE_HASH_THRESHOLD = int(os.environ.get('DIAGNOSIS_IMAGE_HASH_THRESHOLD', 0))
+
+# تحميل مسبق لمكونات التشخيص الثقيلة (نموذج الأعراض و SDK الخاص بـ Roboflow) عند إقلاع gunicorn
+# (انظر gunicorn.conf.py). بدونه تُحمَّل عند أول طلب يحتاجها
+DIAGNOSIS_WARM_UP = os.environ.get('DIAGNOSIS_WARM_UP', 'True') == 'True'
+
+# تحميل نموذج التشخيص بالأعراض من model/<version>/svm_model.npz (مقيّم NumPy فقط، بدون sklearn)
+# عند وجوده، وإلا من ملفات pickle. يُنشأ الملف عبر: python manage.py export_model_npz <version>
+DIAGNOSIS_MODEL_NPZ = os.environ.get('DIAGNOSIS_MODEL_NPZ', 'True') == 'True'
+
+# سجل التشخيص (DiagnosisRecord): يُكتب من مخزن مؤقت في كل عملية بـ bulk_create كل
+# DIAGNOSIS_HISTORY_BATCH_SIZE سجلاً أو كل DIAGNOSIS_HISTORY_FLUSH_INTERVAL ثانية
+DIAGNOSIS_HISTORY_ENABLED = os.environ.get('DIAGNOSIS_HISTORY_ENABLED', 'True') == 'True'
+DIAGNOSIS_HISTORY_BATCH_SIZE = int(os.environ.get('DIAGNOSIS_HISTORY_BATCH_SIZE', 100))
+DIAGNOSIS_HISTORY_FLUSH_INTERVAL = float(os.environ.get('DIAGNOSIS_HISTORY_FLUSH_INTERVAL', 5))
+
+# صندوق صادر إشعارات Pushy (notifications.PushOutbox): عدد خيوط الإرسال في كل عملية،
+# أقصى عدد محاولات للخطأ المؤقت، والتأخير الأساسي (بالثواني) قبل إعادة المحاولة (يتضاعف كل مرة)
+PUSH_OUTBOX_WORKERS = int(os.environ.get('PUSH_OUTBOX_WORKERS', 2))
+PUSH_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('PUSH_OUTBOX_MAX_ATTEMPTS', 5))
+PUSH_OUTBOX_RETRY_DELAY = int(os.environ.get('PUSH_OUTBOX_RETRY_DELAY', 30))
+# أقصى عدد لرموز الأجهزة في طلب /push واحد عند الإرسال الجماعي (send_bulk_push)
+PUSHY_MAX_RECIPIENTS = int(os.environ.get('PUSHY_MAX_RECIPIENTS', 1000))
+
+# عميل HTTP لـ Pushy (notifications/http.py): عنوان /push (يمكن توجيهه إلى pushy_stub_server محلياً)،
+# عدد الاتصالات الدائمة في المجمّع، ومهلة الاتصال والقراءة بالثواني
+PUSHY_API_URL = os.environ.get('PUSHY_API_URL', 'https://api.pushy.me/push')
+PUSHY_POOL_SIZE = int(os.environ.get('PUSHY_POOL_SIZE', 10))
+PUSHY_CONNECT_TIMEOUT = float(os.environ.get('PUSHY_CONNECT_TIMEOUT', 5))
+PUSHY_READ_TIMEOUT = float(os.environ.get('PUSHY_READ_TIMEOUT', 10))
+
+# تنظيف رموز الأجهزة: تُحذف بعد PUSH_TOKEN_MAX_FAILURES إرسالاً أبلغ Pushy بفشله منذ آخر تسجيل للرمز (info.failed)،
+# وأمر prune_push_tokens يحذف ما لم يُعد تسجيله منذ PUSH_TOKEN_MAX_AGE_DAYS يوماً
+PUSH_TOKEN_MAX_FAILURES = int(os.environ.get('PUSH_TOKEN_MAX_FAILURES', 3))
+PUSH_TOKEN_MAX_AGE_DAYS = int(os.environ.get('PUSH_TOKEN_MAX_AGE_DAYS', 180))
+
+# مدة بقاء قوائم رموز أجهزة المستخدمين في ذاكرة Django المؤقتة (بالثواني). تُحذف القائمة فور
+# تسجيل رمز أو حذفه؛ المدة تحدّ من التقادم في العمليات الأخرى عند استخدام LocMemCache الافتراضية
+PUSH_TOKEN_CACHE_TTL = int(os.environ.get('PUSH_TOKEN_CACHE_TTL', 300))
+
+# المنطقة الزمنية لأوقات المنبهات اليومية (alerts.Alert.time) التي يطلقها أمر run_alert_scheduler
+ALERTS_TIME_ZONE = os.environ.get('ALERTS_TIME_ZONE', TIME_ZONE)
+
+# تذكير المواعيد (أمر send_appointment_reminders): يُذكَّر بالمواعيد التي تبدأ خلال
+# APPOINTMENT_REMINDER_WINDOW_HOURS ساعة، وتاريخ الموعد ووقته محليان بتوقيت APPOINTMENTS_TIME_ZONE
+APPOINTMENT_REMINDER_WINDOW_HOURS = float(os.environ.get('APPOINTMENT_REMINDER_WINDOW_HOURS', 24))
+APPOINTMENTS_TIME_ZONE = os.environ.get('APPOINTMENTS_TIME_ZONE', TIME_ZONE)
+
+# تذكير الجرعات المعززة (أمر send_vaccination_reminders اليومي): الجرعات المستحقة خلال هذا العدد من الأيام
+VACCINATION_REMINDER_DAYS = int(os.environ.get('VACCINATION_REMINDER_DAYS', 7))
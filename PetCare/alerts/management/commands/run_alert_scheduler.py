@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from alerts.scheduler import AlertScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the alert scheduler: fire active alerts.Alert reminders as batched push notifications "
+        "at their daily time. Run one instance of this process; an overlapping instance (e.g. during a "
+        "deploy) does not send an alert twice."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll', type=float, default=5.0,
+            help="Seconds between checks for alerts created or changed through the API."
+        )
+
+    def handle(self, *args, **options):
+        scheduler = AlertScheduler()
+        loaded = scheduler.load()
+        self.stdout.write(self.style.SUCCESS(f"Scheduled {loaded} active alert(s)."))
+
+        try:
+            while True:
+                now = timezone.now()
+                changed = scheduler.sync(now)
+                if changed:
+                    self.stdout.write(f"Re-scheduled {changed} changed alert(s).")
+                fired = scheduler.fire(now)
+                if fired:
+                    self.stdout.write(f"Fired {fired} alert(s).")
+                close_old_connections()
+
+                # ننام حتى أقرب منبه أو المزامنة التالية، أيهما أقرب
+                delay = options['poll']
+                next_fire_at = scheduler.next_fire_at()
+                if next_fire_at is not None:
+                    delay = min(delay, (next_fire_at - timezone.now()).total_seconds())
+                time.sleep(max(delay, 0.05))
+        except KeyboardInterrupt:
+            pass
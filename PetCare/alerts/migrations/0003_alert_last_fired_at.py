@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0002_alert_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alert',
+            name='last_fired_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
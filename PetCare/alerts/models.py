@@ -8,6 +8,10 @@ class Alert(models.Model):
     time = models.TimeField()  # وقت التنبيه
     is_active = models.BooleanField(default=True)  # افتراضيًا ON
     created_at = models.DateTimeField(auto_now_add=True)
+    # يتغير مع كل حفظ: منه يعرف مُجدول المنبهات ما أُضيف أو عُدّل (alerts/scheduler.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # وقت آخر إطلاق: يحجزه المُجدول بـ UPDATE شرطي قبل الإرسال، فلا يُرسل الموعد نفسه مرتين
+    last_fired_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.name} at {self.time} ({'ON' if self.is_active else 'OFF'})"
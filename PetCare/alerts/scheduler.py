@@ -0,0 +1,154 @@
+import heapq
+import logging
+import zoneinfo
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from notifications.outbox import notify
+
+from .models import Alert
+
+logger = logging.getLogger(__name__)
+
+
+def _alerts_tz():
+    return zoneinfo.ZoneInfo(getattr(settings, 'ALERTS_TIME_ZONE', None) or settings.TIME_ZONE)
+
+
+def next_fire_time(alert_time, after):
+    """أول موعد يومي للمنبه (alert_time بتوقيت ALERTS_TIME_ZONE) بعد اللحظة after تماماً."""
+    tz = _alerts_tz()
+    local = after.astimezone(tz)
+    day = local.date()
+    while True:
+        candidate = datetime.combine(day, alert_time, tzinfo=tz)
+        if candidate > after:
+            return candidate
+        day += timedelta(days=1)
+
+
+class AlertScheduler:
+    """
+    مُجدول المنبهات (alerts.Alert) داخل عملية واحدة مخصصة (أمر run_alert_scheduler).
+
+    يحتفظ بكومة صغرى (heapq) من (موعد الإطلاق، معرّف المنبه، إصداره) لكل منبه مفعّل،
+    فمعرفة المستحق الآن O(1) وإخراجه O(log n)، دون فحص جدول Alert:
+      - load(): القراءة الكاملة الوحيدة، عند بدء العملية.
+      - sync(): ما أُضيف أو عُدّل عبر AlertCreateListView و AlertUpdateDeleteView فقط، من
+        الفهرس على updated_at (الإصدار). الإصدار الأحدث يُبطل مدخلات الكومة القديمة.
+      - fire(): يخرج المستحقين، ويتحقق منهم باستعلام واحد (المحذوف والمعطّل يسقط هنا)،
+        ويحجزهم بـ UPDATE شرطي على last_fired_at (فلا يتكرر الإرسال إذا عملت نسختان من
+        العملية معاً، كأثناء إعادة النشر)، ثم يرسل إشعاراً واحداً لكل مجموعة منبهات بالاسم
+        والوقت نفسيهما، ويجدول الغد.
+    """
+
+    # نافذة تداخل لـ sync: صف حُفظ في معاملة أُكّدت متأخرة قد يحمل updated_at أقدم من المؤشر
+    SYNC_OVERLAP = timedelta(seconds=60)
+
+    def __init__(self):
+        self._heap = []
+        # الإصدار (updated_at) المعروف لكل منبه مجدول؛ غيابه يعني أنه غير مجدول
+        self._versions = {}
+        self._cursor = None
+
+    def __len__(self):
+        return len(self._versions)
+
+    def next_fire_at(self):
+        """أقرب موعد إطلاق في الكومة (أو None)."""
+        while self._heap and self._versions.get(self._heap[0][1]) != self._heap[0][2]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def load(self, now=None):
+        now = now or timezone.now()
+        self._heap, self._versions = [], {}
+        self._cursor = now
+        for alert_id, alert_time, version in Alert.objects.filter(is_active=True).values_list('id', 'time', 'updated_at'):
+            self._schedule(alert_id, alert_time, version, now)
+        heapq.heapify(self._heap)
+        return len(self._versions)
+
+    def sync(self, now=None):
+        """يضيف إلى الكومة ما أُنشئ أو عُدّل منذ آخر مزامنة. يعيد عدد المنبهات المتغيرة."""
+        now = now or timezone.now()
+        changes = Alert.objects.filter(updated_at__gte=self._cursor - self.SYNC_OVERLAP).values_list(
+            'id', 'time', 'is_active', 'updated_at'
+        )
+        self._cursor = now
+        changed = 0
+        for alert_id, alert_time, is_active, version in changes:
+            if self._versions.get(alert_id) == version:
+                continue
+            changed += 1
+            if is_active:
+                self._schedule(alert_id, alert_time, version, now, push=True)
+            else:
+                self._versions.pop(alert_id, None)
+        return changed
+
+    def _schedule(self, alert_id, alert_time, version, after, push=False):
+        self._versions[alert_id] = version
+        entry = (next_fire_time(alert_time, after), alert_id, version)
+        if push:
+            heapq.heappush(self._heap, entry)
+        else:
+            self._heap.append(entry)
+
+    def pop_due(self, now):
+        """يخرج من الكومة المنبهات المستحقة (موعدها <= now) بإصداراتها الحالية فقط."""
+        due = {}
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, alert_id, version = heapq.heappop(self._heap)
+            if self._versions.get(alert_id) == version:
+                due[alert_id] = (fire_at, version)
+        return due
+
+    def fire(self, now=None):
+        """يرسل المنبهات المستحقة ويجدول موعدها التالي. يعيد عدد المنبهات المرسلة."""
+        now = now or timezone.now()
+        due = self.pop_due(now)
+        if not due:
+            return 0
+
+        alerts = {
+            alert.id: alert
+            for alert in Alert.objects.filter(id__in=due, is_active=True).only('id', 'owner_id', 'name', 'time', 'updated_at')
+        }
+
+        # حجز: منبه لم يُطلق منذ موعده الحالي. UPDATE واحد لكل موعد (غالباً موعد واحد في كل استدعاء)
+        by_fire_at = {}
+        for alert_id, (fire_at, version) in due.items():
+            if alert_id in alerts and alerts[alert_id].updated_at == version:
+                by_fire_at.setdefault(fire_at, []).append(alert_id)
+        for fire_at, alert_ids in by_fire_at.items():
+            Alert.objects.filter(
+                Q(last_fired_at__isnull=True) | Q(last_fired_at__lt=fire_at), id__in=alert_ids
+            ).update(last_fired_at=now)
+        claimed = set(Alert.objects.filter(id__in=alerts, last_fired_at=now).values_list('id', flat=True))
+
+        groups = {}
+        for alert_id, (fire_at, version) in due.items():
+            alert = alerts.get(alert_id)
+            if alert is None:
+                # حُذف أو عُطّل
+                self._versions.pop(alert_id, None)
+                continue
+            if alert.updated_at != version:
+                # عُدّل بعد آخر مزامنة: الإصدار الجديد يُجدول في sync التالية
+                continue
+            self._schedule(alert.id, alert.time, version, max(now, fire_at), push=True)
+            # غير المحجوز أطلقته عملية أخرى
+            if alert_id in claimed:
+                groups.setdefault((alert.name, alert.time.strftime('%H:%M')), []).append(alert.owner_id)
+
+        sent = 0
+        for (name, at), owner_ids in groups.items():
+            notify(owner_ids, name, f"Reminder: {name} ({at})", {"action": "ALERT_REMINDER", "name": name, "time": at})
+            sent += len(owner_ids)
+        if sent:
+            logger.info(f"Fired {sent} alert(s) in {len(groups)} push batch(es).")
+        return sent
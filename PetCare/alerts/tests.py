@@ -1,3 +1,71 @@
+from datetime import timedelta
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+
+from account.models import User
+
+from . import scheduler
+from .models import Alert
+from .scheduler import AlertScheduler, _alerts_tz, next_fire_time
+
+
+class AlertSchedulerTests(TestCase):
+    """الكومة والإصدارات (updated_at) والحجز في AlertScheduler."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x', first_name='A', last_name='B')
+        self.start = timezone.now()
+        self.alert = Alert.objects.create(owner=self.user, name='Feed', time=self.in_hours(1))
+        self.fire_at = next_fire_time(self.alert.time, self.start)
+        notify = mock.patch.object(scheduler, 'notify')
+        self.notify = notify.start()
+        self.addCleanup(notify.stop)
+
+    def in_hours(self, hours):
+        # وقت يومي بعد hours ساعة من بداية الاختبار، فلا تتغير النتيجة بوقت تشغيله
+        return (self.start.astimezone(_alerts_tz()) + timedelta(hours=hours)).time().replace(second=0, microsecond=0)
+
+    def loaded(self):
+        alerts = AlertScheduler()
+        alerts.load(self.start)
+        return alerts
+
+    def test_update_reschedules_alert(self):
+        alerts = self.loaded()
+        self.assertEqual(alerts.next_fire_at(), self.fire_at)
+
+        self.alert.time = self.in_hours(2)
+        self.alert.save()
+        self.assertEqual(alerts.sync(self.start + timedelta(seconds=1)), 1)
+
+        new_fire_at = next_fire_time(self.alert.time, self.start)
+        self.assertEqual(alerts.next_fire_at(), new_fire_at)
+        self.assertEqual(alerts.fire(self.fire_at), 0)
+        self.assertEqual(alerts.fire(new_fire_at), 1)
+        self.notify.assert_called_once_with(
+            [self.user.id], 'Feed', f"Reminder: Feed ({self.alert.time:%H:%M})", mock.ANY
+        )
+
+    def test_alert_deleted_before_firing_is_dropped(self):
+        alerts = self.loaded()
+        self.alert.delete()
+
+        self.assertEqual(alerts.fire(self.fire_at), 0)
+
+        self.notify.assert_not_called()
+        self.assertEqual(len(alerts), 0)
+        self.assertIsNone(alerts.next_fire_at())
+
+    def test_two_schedulers_do_not_fire_twice(self):
+        first, second = self.loaded(), self.loaded()
+
+        self.assertEqual(first.fire(self.fire_at), 1)
+        self.assertEqual(second.fire(self.fire_at + timedelta(seconds=2)), 0)
 
-# Create your tests here.
+        self.notify.assert_called_once()
+        # كلاهما يجدول موعد الغد
+        for alerts in (first, second):
+            self.assertEqual(alerts.next_fire_at(), next_fire_time(self.alert.time, self.fire_at))
+        self.assertEqual(first.fire(next_fire_time(self.alert.time, self.fire_at)), 1)
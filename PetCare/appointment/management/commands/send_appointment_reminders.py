@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from appointment.reminders import due_appointments, send_due_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Send one push reminder per pet owner for appointments starting within the reminder window "
+        "that have not been reminded yet. Run it periodically (e.g. every 5 minutes from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window-hours', type=float, default=None,
+            help="Remind appointments starting within this many hours (default: APPOINTMENT_REMINDER_WINDOW_HOURS)."
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Only count the due appointments.")
+
+    def handle(self, *args, **options):
+        window = timedelta(hours=options['window_hours']) if options['window_hours'] is not None else None
+        if options['dry_run']:
+            self.stdout.write(f"{due_appointments(window=window).count()} appointment(s) due for a reminder.")
+            return
+        appointments, owners = send_due_reminders(window=window)
+        self.stdout.write(self.style.SUCCESS(f"Reminded {owners} owner(s) of {appointments} appointment(s)."))
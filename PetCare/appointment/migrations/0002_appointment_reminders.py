@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointment', '0001_initial'),
+        ('pets', '0010_remove_pet_qr_code_image_alter_pet_qr_token_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='reminder_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['date', 'time'], name='appointment_date_time_idx'),
+        ),
+    ]
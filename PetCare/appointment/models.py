@@ -11,9 +11,15 @@ class Appointment(models.Model):
     date = models.DateField()
     time = models.TimeField()
     provider = models.CharField(max_length=255)
+    # وقت إرسال تذكير الموعد (None: لم يُرسل بعد). يُصفَّر عند تغيير التاريخ أو الوقت
+    reminder_sent_at = models.DateTimeField(null=True, blank=True)
     
     def __str__(self):
         return f"Appointment for {self.pet.pet_name} on {self.date}"
 
     class Meta:
         verbose_name_plural = "Appointments"
+        indexes = [
+            # استعلام المواعيد المستحقة للتذكير (appointment/reminders.py) بمدى على (date, time)
+            models.Index(fields=['date', 'time'], name='appointment_date_time_idx'),
+        ]
@@ -0,0 +1,83 @@
+import zoneinfo
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from notifications.outbox import notify
+
+from .models import Appointment
+
+
+def _window_filter(start, end):
+    """
+    شرط المواعيد بين start و end (تاريخ ووقت محليان) على (date, time)، بحيث
+    يبقى مدى واحداً على الفهرس appointment_date_time_idx حتى لو عبر منتصف الليل.
+    """
+    if start.date() == end.date():
+        return Q(date=start.date(), time__gte=start.time(), time__lte=end.time())
+    return (
+        Q(date=start.date(), time__gte=start.time())
+        | Q(date__gt=start.date(), date__lt=end.date())
+        | Q(date=end.date(), time__lte=end.time())
+    )
+
+
+def due_appointments(now=None, window=None):
+    """
+    المواعيد التي تبدأ خلال window من الآن ولم يُرسل تذكيرها بعد.
+    date و time محليان بتوقيت APPOINTMENTS_TIME_ZONE.
+    """
+    now = now or timezone.now()
+    if window is None:
+        window = timedelta(hours=getattr(settings, 'APPOINTMENT_REMINDER_WINDOW_HOURS', 24))
+    tz = zoneinfo.ZoneInfo(getattr(settings, 'APPOINTMENTS_TIME_ZONE', None) or settings.TIME_ZONE)
+    start = now.astimezone(tz).replace(tzinfo=None)
+    return Appointment.objects.filter(_window_filter(start, start + window), reminder_sent_at__isnull=True)
+
+
+def _message(appointments):
+    if len(appointments) == 1:
+        a = appointments[0]
+        return (
+            "Appointment Reminder",
+            f"{a.service} for {a.pet.pet_name} with {a.provider} on {a.date} at {a.time:%H:%M}"
+        )
+    items = "; ".join(f"{a.pet.pet_name}: {a.service} on {a.date} at {a.time:%H:%M}" for a in appointments)
+    return "Appointment Reminders", f"You have {len(appointments)} upcoming appointments. {items}"
+
+
+def send_due_reminders(now=None, window=None):
+    """
+    يرسل تذكيراً واحداً لكل مالك بكل مواعيده المستحقة، ويعيد (عدد المواعيد، عدد الإشعارات).
+
+    المواعيد تُحجز أولاً بـ UPDATE شرطي (reminder_sent_at من NULL إلى وقت هذا التشغيل)، ثم
+    تُقرأ المحجوزة باستعلام واحد، والإشعارات تُكتب في صندوق الصادر داخل المعاملة نفسها: لا
+    يُرسل تذكير مرتين حتى مع تشغيلين متزامنين، ولا يضيع إذا فشل التشغيل قبل التأكيد.
+    الكلفة بعدد المواعيد المستحقة لا بحجم الجدول.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        ids = list(due_appointments(now, window).values_list('id', flat=True))
+        if not ids:
+            return 0, 0
+        Appointment.objects.filter(id__in=ids, reminder_sent_at__isnull=True).update(reminder_sent_at=now)
+        claimed = (
+            Appointment.objects.filter(id__in=ids, reminder_sent_at=now)
+            .select_related('pet')
+            .order_by('date', 'time')
+        )
+
+        by_owner = {}
+        for appointment in claimed:
+            by_owner.setdefault(appointment.pet.owner_id, []).append(appointment)
+
+        for owner_id, appointments in by_owner.items():
+            title, body = _message(appointments)
+            notify(owner_id, title, body, {
+                "action": "APPOINTMENT_REMINDER",
+                "appointment_ids": [a.id for a in appointments],
+            })
+    return sum(len(a) for a in by_owner.values()), len(by_owner)
@@ -29,3 +29,12 @@ class AppointmentSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         return Appointment.objects.create(**validated_data)
+
+    def update(self, instance, validated_data):
+        # موعد جديد يحتاج تذكيراً جديداً
+        if (
+            validated_data.get('date', instance.date) != instance.date
+            or validated_data.get('time', instance.time) != instance.time
+        ):
+            validated_data['reminder_sent_at'] = None
+        return super().update(instance, validated_data)
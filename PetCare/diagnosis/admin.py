@@ -1,3 +1,17 @@
 from django.contrib import admin
+from .models import DiagnosisJob, DiagnosisRecord
 
-# Register your models here.
+
+@admin.register(DiagnosisJob)
+class DiagnosisJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'status', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    exclude = ('image_data',)
+
+
+@admin.register(DiagnosisRecord)
+class DiagnosisRecordAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'disease', 'confidence', 'pet', 'user', 'model_version', 'created_at')
+    list_filter = ('kind', 'model_version')
+    search_fields = ('disease',)
+    raw_id_fields = ('user', 'pet')
@@ -0,0 +1,94 @@
+import os
+import time
+
+import numpy as np
+
+from . import ml_model
+from .registry import ModelBundle
+
+
+def load_bundle(version, backend, cache_size=0):
+    """
+    يحمّل نسخة مستقلة من إصدار النموذج للقياس والاختبار (بدون ذاكرة نتائج افتراضياً،
+    حتى تقيس الأرقام الاستدلال نفسه لا إصابات الذاكرة). backend: "numpy" أو "sklearn".
+    """
+    return ModelBundle.load(
+        os.path.join(ml_model.MODEL_DIR, version),
+        version,
+        cache_size=cache_size,
+        prefer_npz=(backend == "numpy"),
+    )
+
+
+def _class_weights(model):
+    # متوسط أوزان المصنف الخطي لكل مرض عبر الـ folds: (n_classes, n_features)
+    if hasattr(model, 'coef'):
+        return model.coef.mean(axis=0)
+    return np.mean([c.estimator.coef_ for c in model.calibrated_classifiers_], axis=0)
+
+
+def random_inputs(features, n, rng, max_symptoms=8):
+    """قواميس أعراض عشوائية: بين 1 و max_symptoms عرضاً مختارة بالتساوي من features."""
+    return [
+        {features[i]: 1 for i in rng.choice(len(features), size=rng.integers(1, max_symptoms + 1), replace=False)}
+        for _ in range(n)
+    ]
+
+
+def realistic_inputs(bundle, n, rng, min_symptoms=3, max_symptoms=7):
+    """
+    قواميس أعراض "واقعية": يُختار مرض، ثم أعراض يُرجَّح اختيارها حسب وزنها الموجب
+    لهذا المرض في النموذج، فتشبه تركيبات الأعراض التي يراها النموذج فعلاً.
+    """
+    weights = np.clip(_class_weights(bundle.model), 0, None)
+    features = bundle.features
+    inputs = []
+    for _ in range(n):
+        w = weights[rng.integers(len(weights))]
+        p = w / w.sum() if w.sum() > 0 else None
+        size = min(rng.integers(min_symptoms, max_symptoms + 1), np.count_nonzero(w) or len(features))
+        inputs.append({features[i]: 1 for i in rng.choice(len(features), size=size, replace=False, p=p)})
+    return inputs
+
+
+def _percentiles(samples):
+    samples = np.asarray(samples) * 1e6
+    return {
+        "p50_us": round(float(np.percentile(samples, 50)), 1),
+        "p95_us": round(float(np.percentile(samples, 95)), 1),
+        "p99_us": round(float(np.percentile(samples, 99)), 1),
+        "mean_us": round(float(samples.mean()), 1),
+    }
+
+
+def measure_single(bundle, inputs, warmup=50):
+    """زمن ml_model.predict لصف واحد: النسب المئوية والإنتاجية (تشخيص/ثانية)."""
+    for symptoms in inputs[:warmup]:
+        ml_model.predict(symptoms, bundle=bundle)
+    samples = []
+    start = time.perf_counter()
+    for symptoms in inputs:
+        t = time.perf_counter()
+        ml_model.predict(symptoms, bundle=bundle)
+        samples.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    return {**_percentiles(samples), "throughput_per_s": round(len(inputs) / elapsed, 1)}
+
+
+def measure_batch(bundle, inputs, batch_size, warmup=5):
+    """زمن ml_model.predict_batch لكل دفعة بحجم batch_size، والإنتاجية بعدد الحيوانات/ثانية."""
+    batches = [inputs[i:i + batch_size] for i in range(0, len(inputs) - batch_size + 1, batch_size)]
+    for batch in batches[:warmup]:
+        ml_model.predict_batch(batch, bundle=bundle)
+    samples = []
+    start = time.perf_counter()
+    for batch in batches:
+        t = time.perf_counter()
+        ml_model.predict_batch(batch, bundle=bundle)
+        samples.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    return {
+        **_percentiles(samples),
+        "batches": len(batches),
+        "throughput_per_s": round(len(batches) * batch_size / elapsed, 1),
+    }
@@ -0,0 +1,63 @@
+import math
+import threading
+
+import numpy as np
+
+
+class SymptomEncoder:
+    """
+    مُرمِّز أعراض مُجهَّز مسبقاً يحل محل بناء pandas DataFrame في المسار الساخن.
+
+    تُبنى خريطة (اسم العرض ← رقم العمود) مرة واحدة من features.pkl، ثم تُكتب القيم
+    مباشرة في صف أو مصفوفة NumPy. النتيجة مطابقة لـ:
+        pd.DataFrame(rows, columns=features).fillna(0).clip(0, 1)
+    """
+
+    def __init__(self, features):
+        self.features = list(features)
+        self.n_features = len(self.features)
+        self.index = {name: i for i, name in enumerate(self.features)}
+        # صف محجوز مسبقاً لكل خيط (thread) لتجنب التخصيص في كل طلب
+        self._local = threading.local()
+
+    def _row_buffer(self):
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = np.zeros((1, self.n_features), dtype=np.float64)
+            self._local.row = row
+        return row
+
+    def _fill(self, out, symptoms: dict):
+        index = self.index
+        for name, value in symptoms.items():
+            i = index.get(name)
+            # الأعراض غير الموجودة في features يتم تجاهلها كما في DataFrame
+            if i is None or value is None:
+                continue
+            value = float(value)
+            # fillna(0) ثم clip(0, 1)
+            if math.isnan(value) or value <= 0.0:
+                continue
+            out[i] = 1.0 if value >= 1.0 else value
+
+    def encode(self, symptoms: dict, out=None):
+        """
+        يرمّز قاموس أعراض واحد إلى صف بشكل (1, n_features).
+
+        إذا لم يُمرَّر out يُعاد استخدام الصف المحجوز للخيط الحالي، لذلك يجب
+        استهلاك النتيجة قبل الاستدعاء التالي من نفس الخيط.
+        """
+        if out is None:
+            out = self._row_buffer()
+        out.fill(0.0)
+        self._fill(out[0], symptoms)
+        return out
+
+    def encode_batch(self, symptoms_list: list):
+        """
+        يرمّز قائمة من قواميس الأعراض إلى مصفوفة (len(symptoms_list), n_features).
+        """
+        X = np.zeros((len(symptoms_list), self.n_features), dtype=np.float64)
+        for row, symptoms in zip(X, symptoms_list):
+            self._fill(row, symptoms)
+        return X
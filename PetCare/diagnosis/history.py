@@ -0,0 +1,181 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+
+from .models import DiagnosisRecord
+
+logger = logging.getLogger(__name__)
+
+
+class RecordBuffer:
+    """
+    مخزن مؤقت داخل العملية لسجلات التشخيص (DiagnosisRecord غير محفوظة).
+
+    الطلب يضيف السجل إلى قائمة في الذاكرة فقط، وخيط خلفي يكتبها بـ bulk_create
+    (INSERT واحد لكل دفعة) كلما بلغت batch_size سجلاً أو مرت flush_interval ثانية،
+    فلا يضيف الحفظ أي INSERT إلى زمن الطلب.
+
+    إذا تعذّرت الكتابة تبقى السجلات في المخزن لإعادة المحاولة، بحد أقصى max_pending
+    سجلاً (يُحذف الأقدم بعده) حتى لا تنمو الذاكرة بلا حد أثناء تعطل قاعدة البيانات.
+    أما خطأ IntegrityError (مثل حيوان حُذف قبل الكتابة) فيخص سجلاً بعينه: تُعاد الدفعة
+    سجلاً سجلاً ويُسقط الفاشل وحده، فلا يوقف سجل تالف كل ما بعده.
+    """
+
+    def __init__(self, batch_size=100, flush_interval=5.0, max_pending=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending or batch_size * 10
+        self.dropped = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        # يمنع كتابتين متزامنتين (الخيط الخلفي و flush() عند الخروج)
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, record):
+        with self._lock:
+            self._pending.append(record)
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                del self._pending[:overflow]
+                self.dropped += overflow
+            full = len(self._pending) >= self.batch_size
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """يكتب كل السجلات المعلّقة الآن. يعيد عدد السجلات المكتوبة."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                # القيود الأجنبية مؤجلة حتى التأكيد: المعاملة تجعل الخطأ يظهر هنا
+                with transaction.atomic():
+                    DiagnosisRecord.objects.bulk_create(batch, batch_size=self.batch_size)
+            except IntegrityError as e:
+                logger.warning(f"Writing {len(batch)} diagnosis records failed, retrying one by one: {e}")
+                return self._write_each(batch)
+            except Exception as e:
+                logger.error(f"Writing {len(batch)} diagnosis records failed, will retry: {e}")
+                self._requeue(batch)
+                return 0
+            return len(batch)
+
+    def _write_each(self, batch):
+        written = 0
+        for i, record in enumerate(batch):
+            # bulk_create الفاشل قد يكون عيّن pk من RETURNING
+            record.pk = None
+            record._state.adding = True
+            try:
+                with transaction.atomic():
+                    record.save(force_insert=True)
+            except IntegrityError as e:
+                with self._lock:
+                    self.dropped += 1
+                logger.error(f"Dropping diagnosis record (pet={record.pet_id}, user={record.user_id}): {e}")
+            except Exception as e:
+                logger.error(f"Writing {len(batch) - i} diagnosis records failed, will retry: {e}")
+                self._requeue(batch[i:])
+                break
+            else:
+                written += 1
+        return written
+
+    def _requeue(self, batch):
+        with self._lock:
+            # إعادتها إلى أول المخزن بنفس الترتيب، مع احترام الحد الأقصى
+            self._pending = (batch + self._pending)[-self.max_pending:]
+
+    def _ensure_thread(self):
+        # الخيط يُنشأ عند أول سجل في كل عملية (الخيوط لا تنتقل عبر fork في gunicorn)
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='diagnosis-history', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """مخزن سجلات التشخيص لهذه العملية، مبني من إعدادات DIAGNOSIS_HISTORY_*."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = RecordBuffer(
+                    batch_size=getattr(settings, 'DIAGNOSIS_HISTORY_BATCH_SIZE', 100),
+                    flush_interval=getattr(settings, 'DIAGNOSIS_HISTORY_FLUSH_INTERVAL', 5.0)
+                )
+                # كتابة ما تبقى عند إيقاف العملية (إيقاف gunicorn worker بشكل طبيعي)
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+def record(**fields):
+    """
+    يسجّل تشخيصاً واحداً (حقول DiagnosisRecord) دون أي استعلام لقاعدة البيانات في الطلب.
+    لا يفعل شيئاً إذا كان DIAGNOSIS_HISTORY_ENABLED معطلاً.
+    """
+    if not getattr(settings, 'DIAGNOSIS_HISTORY_ENABLED', True):
+        return
+    get_buffer().add(DiagnosisRecord(**fields))
+
+
+def record_symptoms(user_id, pet_id, bundle, symptoms, disease, confidence, differential=None):
+    """
+    سجل تشخيص بالأعراض. يحفظ الأعراض المعروفة للنموذج غير الصفرية فقط، بالقيم
+    كما رمّزها SymptomEncoder (الأسماء غير المعروفة والقيم الصفرية لا تُحفظ).
+    """
+    row = bundle.symptom_encoder.encode_batch([symptoms])[0]
+    record(
+        user_id=user_id,
+        pet_id=pet_id,
+        kind=DiagnosisRecord.KIND_SYMPTOMS,
+        model_version=bundle.version,
+        symptoms={bundle.symptom_encoder.features[i]: float(row[i]) for i in row.nonzero()[0]},
+        disease=disease,
+        confidence=confidence,
+        result={"differential": differential} if differential is not None else None,
+    )
+
+
+def record_image(user_id, pet_id, result, model_version=''):
+    """سجل تشخيص بالصور من نتيجة run_inference: المرض الأعلى ثقة مع كل التوقعات."""
+    predictions = result.get('predictions') or []
+    top = max(predictions, key=lambda p: p.get('confidence') or 0, default=None)
+    record(
+        user_id=user_id,
+        pet_id=pet_id,
+        kind=DiagnosisRecord.KIND_IMAGE,
+        model_version=model_version or '',
+        disease=(top or {}).get('disease') or '',
+        confidence=(top or {}).get('confidence'),
+        result=result,
+        cached=bool(result.get('cached')),
+    )
@@ -0,0 +1,112 @@
+import io
+import threading
+import time
+from collections import OrderedDict
+
+# dHash بدقة 8x8 = 64 بت
+HASH_SIZE = 8
+
+
+def dhash(data):
+    """
+    بصمة إدراكية (difference hash) لصورة مرمّزة (bytes) كعدد صحيح من 64 بت.
+
+    تُحسب على الصورة بعد المعالجة المسبقة (نفس ما يُرسل إلى النموذج)، فلا تتأثر
+    بـ EXIF أو دقة الصورة الأصلية، وتتغير بتات قليلة فقط عند إعادة الضغط أو تغيّر الإضاءة قليلاً.
+    """
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    # فك ترميز JPEG بأقل دقة ممكنة: البصمة تحتاج 9x8 بكسل فقط
+    image.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+    pixels = image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BILINEAR).tobytes()
+
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+class ImageResultCache:
+    """
+    ذاكرة محدودة الحجم لنتائج نموذج الكشف، مفتاحها البصمة الإدراكية للصورة.
+
+    تُعتبر صورتان متطابقتين إذا كانت مسافة Hamming بين بصمتيهما لا تتجاوز threshold
+    (0 = تطابق تام للبصمة فقط). لكل مدخل مدة صلاحية ttl ثانية، وعند تجاوز maxsize
+    يُحذف الأقدم استخداماً. المدخلات مفصولة حسب namespace (نموذج الكشف وإصداره).
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600, threshold=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        # (namespace, hash) ← (وقت انتهاء الصلاحية, القيمة)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace, image_hash):
+        now = time.monotonic()
+        with self._lock:
+            key = (namespace, image_hash)
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._data[key]
+                entry = None
+            if entry is None and self.threshold > 0:
+                key = self._nearest(namespace, image_hash, now)
+                entry = self._data.get(key) if key is not None else None
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _nearest(self, namespace, image_hash, now):
+        # بحث خطي: بضعة آلاف من عمليات XOR/bit_count أرخص بكثير من استدلال بعيد واحد
+        best_key, best_distance = None, self.threshold + 1
+        expired = []
+        for key, (expires, _) in self._data.items():
+            if expires <= now:
+                expired.append(key)
+                continue
+            if key[0] != namespace:
+                continue
+            distance = (key[1] ^ image_hash).bit_count()
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+        for key in expired:
+            del self._data[key]
+        return best_key
+
+    def put(self, namespace, image_hash, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            key = (namespace, image_hash)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "threshold": self.threshold,
+            }
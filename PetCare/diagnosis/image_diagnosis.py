@@ -0,0 +1,276 @@
+import hashlib
+import io
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from rest_framework import status
+
+from . import roboflow_client
+from .image_cache import ImageResultCache, dhash
+from .image_preprocessing import PreparedImage, model_input_size, prepare_image
+
+logger = logging.getLogger(__name__)
+
+
+class DiagnosisError(Exception):
+    """خطأ في مسار التشخيص بالصور يحمل رسالة ورمز HTTP المناسبين للرد."""
+
+    def __init__(self, detail, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+# --- نماذج الكشف (Detectors) ---
+
+class RoboflowDetector:
+    """نموذج الكشف البعيد على Roboflow Hosted API."""
+
+    def __init__(self):
+        if not roboflow_client.sdk_available():
+            raise DiagnosisError("Roboflow library is not installed on the server.")
+
+        # إعداد مفاتيح Roboflow وفصل معرّفات المشروع والإصدار (يجب إضافتها في settings.py)
+        self.api_key = getattr(settings, 'ROBOFLOW_API_KEY', None)
+        self.model_endpoint = getattr(settings, 'ROBOFLOW_MODEL_ENDPOINT', None)
+
+        if not self.api_key or not self.model_endpoint:
+            logger.error("Roboflow settings are missing.")
+            raise DiagnosisError("Roboflow API Key or Model Endpoint is not configured.")
+
+        try:
+            # مثال: 'workspace_name/project_name/version_id'
+            roboflow_client.parse_model_endpoint(self.model_endpoint)
+        except ValueError:
+            raise DiagnosisError(
+                "ROBOFLOW_MODEL_ENDPOINT format is incorrect. Expected: workspace_name/project_name/version_id"
+            )
+
+        # نتائج إصدار نموذج لا تصلح لإصدار آخر
+        self.cache_namespace = f"roboflow:{self.model_endpoint}"
+        # يُحفظ مع سجل التشخيص
+        self.model_version = self.model_endpoint
+
+    def _model(self):
+        # مقبض النموذج من الذاكرة على مستوى العملية (يُحل عبر SDK مرة كل TTL فقط)
+        model = roboflow_client.get_model(
+            self.api_key,
+            self.model_endpoint,
+            ttl=getattr(settings, 'ROBOFLOW_MODEL_CACHE_TTL', 3600)
+        )
+        try:
+            # مشروع تصنيف أو تقسيم دلالي خطأ إعداد لا فشل استدلال
+            roboflow_client.check_model_type(model)
+        except ValueError as e:
+            logger.error(str(e))
+            raise DiagnosisError(str(e))
+        return model
+
+    def input_size(self, default):
+        return model_input_size(self._model(), default=default)
+
+    def infer(self, image):
+        # طلب HTTP واحد إلى Roboflow Hosted API
+        return roboflow_client.infer(
+            self._model(),
+            self.api_key,
+            image,
+            api_url=getattr(settings, 'ROBOFLOW_API_URL', "https://detect.roboflow.com/"),
+            confidence=40,
+            timeout=getattr(settings, 'ROBOFLOW_INFERENCE_TIMEOUT', 30)
+        )
+
+    def on_failure(self):
+        # قد يكون المقبض المخزّن غير صالح (إصدار محذوف، مفتاح تغيّر...) فنعيد حله في الطلب التالي
+        roboflow_client.invalidate_model(self.model_endpoint)
+
+
+class LocalDetector:
+    """
+    بديل محلي لنموذج Roboflow للاختبارات والتطوير: لا يتصل بالشبكة ويعيد نتيجة ثابتة
+    مشتقة من محتوى الصورة بنفس صيغة استجابة Roboflow.
+    DIAGNOSIS_LOCAL_DETECTOR_DELAY يحاكي زمن الاستدلال البعيد (بالثواني).
+    """
+    cache_namespace = "local"
+    model_version = "local"
+
+    def input_size(self, default):
+        return (default, default), False
+
+    def infer(self, image):
+        from PIL import Image
+
+        delay = getattr(settings, 'DIAGNOSIS_LOCAL_DETECTOR_DELAY', 0)
+        if delay:
+            time.sleep(delay)
+
+        data = image if isinstance(image, bytes) else image.read()
+        digest = hashlib.sha1(data).hexdigest()
+        try:
+            width, height = Image.open(io.BytesIO(data)).size
+        except OSError:
+            width, height = 0, 0
+
+        return {
+            "inference_id": f"local-{digest[:16]}",
+            "image": {"width": width, "height": height},
+            "predictions": [
+                {
+                    "class": "local-stand-in",
+                    "confidence": int(digest[:2], 16) / 255,
+                    "x": width / 2,
+                    "y": height / 2,
+                    "width": width / 2,
+                    "height": height / 2
+                }
+            ]
+        }
+
+    def on_failure(self):
+        pass
+
+
+DETECTORS = {
+    'roboflow': RoboflowDetector,
+    'local': LocalDetector,
+}
+
+
+def get_detector():
+    """نموذج الكشف المحدد في DIAGNOSIS_IMAGE_BACKEND ('roboflow' افتراضياً أو 'local')."""
+    backend = getattr(settings, 'DIAGNOSIS_IMAGE_BACKEND', 'roboflow')
+    try:
+        return DETECTORS[backend]()
+    except KeyError:
+        raise DiagnosisError(f"Unknown DIAGNOSIS_IMAGE_BACKEND '{backend}'.")
+
+
+# --- مراحل التشخيص ---
+
+def prepare_upload(detector, image_file):
+    """
+    يجهّز الصورة المرفوعة للإرسال. يعيد (image, prepared) حيث image هي bytes أو كائن ملف،
+    و prepared هي PreparedImage (أو None بدون معالجة مسبقة).
+    """
+    # تصغير الصورة إلى دقة إدخال النموذج وإعادة ترميزها JPEG بدون EXIF،
+    # فيُرفع بضع عشرات من KB بدل صورة الهاتف كاملة (4-12MB)
+    if getattr(settings, 'DIAGNOSIS_IMAGE_PREPROCESS', True):
+        try:
+            target_size, stretch = detector.input_size(getattr(settings, 'DIAGNOSIS_IMAGE_MAX_SIZE', 640))
+        except DiagnosisError:
+            raise
+        except Exception as e:
+            detector.on_failure()
+            raise _inference_failed(e)
+        try:
+            prepared = prepare_image(
+                image_file,
+                target_size,
+                stretch=stretch,
+                quality=getattr(settings, 'DIAGNOSIS_IMAGE_JPEG_QUALITY', 85)
+            )
+        except OSError:
+            raise DiagnosisError("Uploaded file is not a valid image.", status.HTTP_400_BAD_REQUEST)
+        return prepared.data, prepared
+
+    # بدون معالجة مسبقة: الصورة تُرسل من الذاكرة مباشرة دون ملف مؤقت. الملفات الأكبر
+    # من FILE_UPLOAD_MAX_MEMORY_SIZE (2.5MB افتراضياً في Django) فقط يخزّنها Django على القرص أثناء الرفع،
+    # ونرسلها عندها كتدفق دون تحميلها كاملة في الذاكرة.
+    if isinstance(image_file, InMemoryUploadedFile):
+        return image_file.read(), None
+    return image_file.file, None
+
+
+# ذاكرة نتائج الصور على مستوى العملية، تُنشأ عند أول استخدام
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """ذاكرة نتائج التشخيص بالصور (ImageResultCache) المبنية من إعدادات DIAGNOSIS_IMAGE_CACHE_*."""
+    global _image_cache
+    if _image_cache is None:
+        with _image_cache_lock:
+            if _image_cache is None:
+                _image_cache = ImageResultCache(
+                    maxsize=getattr(settings, 'DIAGNOSIS_IMAGE_CACHE_SIZE', 1024),
+                    ttl=getattr(settings, 'DIAGNOSIS_IMAGE_CACHE_TTL', 3600),
+                    threshold=getattr(settings, 'DIAGNOSIS_IMAGE_HASH_THRESHOLD', 0)
+                )
+    return _image_cache
+
+
+def run_inference(detector, image, prepared=None):
+    """
+    يجري الاستدلال ويعيد النتيجة بصيغة الرد: {"predictions": [...], "raw_response_id": ..., "cached": ...}.
+
+    إذا كانت الصورة مجهّزة (prepared) تُبحث نتيجتها أولاً في ذاكرة نتائج الصور عبر بصمتها
+    الإدراكية، فإعادة إرسال نفس الصورة (ولو بدقة أو ضغط مختلفين) لا تكلف استدلالاً بعيداً جديداً.
+    """
+    cache = get_image_cache() if prepared is not None else None
+    image_hash = None
+    cached = None
+    if cache is not None and cache.maxsize > 0:
+        try:
+            image_hash = dhash(prepared.data)
+        except OSError:
+            image_hash = None
+        if image_hash is not None:
+            cached = cache.get(detector.cache_namespace, image_hash)
+
+    if cached is not None:
+        roboflow_result, model_size = cached
+        # الإحداثيات المخزّنة في إطار الصورة المصغّرة للطلب الأول، فنعيدها إلى إطار الصورة الأصلية لهذا الطلب
+        prepared = PreparedImage(prepared.data, prepared.original_size, model_size)
+    else:
+        try:
+            roboflow_result = detector.infer(image)
+        except DiagnosisError:
+            raise
+        except Exception as e:
+            detector.on_failure()
+            raise _inference_failed(e)
+        if image_hash is not None:
+            cache.put(detector.cache_namespace, image_hash, (roboflow_result, prepared.size))
+
+    predictions = roboflow_result.get('predictions', [])
+
+    # إعادة الإحداثيات من إطار الصورة المصغّرة إلى إطار الصورة الأصلية
+    if prepared is not None:
+        predictions = [prepared.to_original(p) for p in predictions]
+
+    diagnosis_results = [
+        {
+            "disease": p.get('class'),
+            # تحويل نسبة الثقة إلى نسبة مئوية (تقريب لأقرب رقمين عشريين)
+            "confidence": round(p.get('confidence', 0) * 100, 2),
+            "location": f"X: {p.get('x')}, Y: {p.get('y')}",
+            "box": {
+                "x": p.get('x'),
+                "y": p.get('y'),
+                "width": p.get('width'),
+                "height": p.get('height')
+            }
+        }
+        for p in predictions
+    ]
+
+    return {
+        "predictions": diagnosis_results,
+        # معرّف الاستدلال يخص طلب صاحب الصورة الأولى (قد يكون مستخدماً آخر): لا يُعاد من الذاكرة
+        "raw_response_id": None if cached is not None else (
+            roboflow_result.get('inference_id') or roboflow_result.get('image', {}).get('id')
+        ),
+        "cached": cached is not None
+    }
+
+
+def _inference_failed(error):
+    logger.error(f"Roboflow SDK Inference Failed: {error}")
+    return DiagnosisError(
+        f"Roboflow SDK Inference Failed. Check project ID/Version, Workspace permissions, or API Key: {error}",
+        status.HTTP_503_SERVICE_UNAVAILABLE
+    )
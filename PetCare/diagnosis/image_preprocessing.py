@@ -0,0 +1,90 @@
+import io
+
+# PIL (ومعه numpy) يُستورد داخل الدوال عند أول معالجة صورة، لا عند تحميل URLconf
+
+
+class PreparedImage:
+    """
+    صورة جاهزة للإرسال إلى نموذج الكشف: JPEG مصغّر بدون EXIF، مع معاملات التحويل
+    اللازمة لإعادة إحداثيات الصناديق (bounding boxes) إلى إطار الصورة الأصلية.
+    """
+
+    def __init__(self, data, original_size, size):
+        self.data = data
+        self.original_size = original_size
+        self.size = size
+        self.scale_x = original_size[0] / size[0]
+        self.scale_y = original_size[1] / size[1]
+
+    def to_original(self, prediction):
+        """يحوّل إحداثيات توقع واحد (x, y, width, height, points) إلى إطار الصورة الأصلية."""
+        mapped = dict(prediction)
+        for key, scale in (('x', self.scale_x), ('width', self.scale_x), ('y', self.scale_y), ('height', self.scale_y)):
+            if mapped.get(key) is not None:
+                mapped[key] = round(mapped[key] * scale, 1)
+        if mapped.get('points'):
+            mapped['points'] = [
+                {**point, 'x': round(point['x'] * self.scale_x, 1), 'y': round(point['y'] * self.scale_y, 1)}
+                for point in mapped['points']
+            ]
+        return mapped
+
+
+def model_input_size(model, default=640):
+    """
+    دقة إدخال النموذج من إعدادات المعالجة المسبقة لإصدار Roboflow (preprocessing.resize)،
+    وإلا (default, default). يعيد أيضاً هل يمط النموذج الصورة (Stretch) أم يحافظ على النسبة.
+    """
+    resize = (getattr(model, 'preprocessing', None) or {}).get('resize') or {}
+    try:
+        size = (int(resize['width']), int(resize['height']))
+    except (KeyError, TypeError, ValueError):
+        return (default, default), False
+    return size, 'Stretch' in str(resize.get('format', ''))
+
+
+def prepare_image(image_file, target_size, stretch=False, quality=85):
+    """
+    يصغّر الصورة إلى دقة إدخال النموذج ويعيد ترميزها JPEG بدون EXIF.
+
+    - يطبّق اتجاه EXIF أولاً، فالإطار "الأصلي" هو الصورة كما يراها المستخدم.
+    - لا يكبّر الصور الصغيرة أبداً.
+    - يستخدم draft() لفك ترميز JPEG الكبيرة مباشرة بدقة مخفّضة (أسرع وذاكرة أقل).
+
+    يرفع PIL.UnidentifiedImageError / OSError إذا لم يكن الملف صورة صالحة.
+    """
+    from PIL import Image, ImageOps
+
+    image = Image.open(image_file)
+    # أبعاد الصورة الأصلية بعد تطبيق اتجاه EXIF (تُقرأ قبل draft لأنه يغيّر image.size)
+    original_size = _oriented_size(image)
+    image.draft('RGB', _stored_target(image, target_size))
+
+    image = ImageOps.exif_transpose(image).convert('RGB')
+
+    width, height = image.size
+    if stretch:
+        if width > target_size[0] or height > target_size[1]:
+            image = image.resize(target_size, Image.Resampling.BILINEAR)
+    else:
+        image.thumbnail(target_size, Image.Resampling.BILINEAR)
+
+    buffer = io.BytesIO()
+    # لا نمرر exif= فيُحذف كل EXIF (الموقع الجغرافي، بيانات الجهاز...) من الصورة المرسلة
+    image.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return PreparedImage(buffer.getvalue(), original_size, image.size)
+
+
+def _is_rotated(image):
+    # الاتجاهات 5-8 في EXIF تدوّر الصورة 90 درجة فتتبادل الأبعاد
+    return image.getexif().get(0x0112, 1) in (5, 6, 7, 8)
+
+
+def _oriented_size(image):
+    width, height = image.size
+    return (height, width) if _is_rotated(image) else (width, height)
+
+
+def _stored_target(image, target_size):
+    # draft() يعمل على الصورة كما هي مخزّنة (قبل التدوير)
+    return (target_size[1], target_size[0]) if _is_rotated(image) else target_size
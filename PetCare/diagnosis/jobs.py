@@ -0,0 +1,84 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import history
+from .image_diagnosis import DiagnosisError, get_detector, run_inference
+from .image_preprocessing import PreparedImage
+from .models import DiagnosisJob
+
+logger = logging.getLogger(__name__)
+
+# مجمّع خيوط خلفي لكل عملية، يُنشأ عند أول استخدام (أي بعد fork في عمليات gunicorn)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'DIAGNOSIS_JOB_WORKERS', 4),
+                    thread_name_prefix='diagnosis-job'
+                )
+    return _executor
+
+
+def submit_job(job_id):
+    """
+    يرسل المهمة إلى مجمّع الخيوط بعد تأكيد المعاملة (حتى يجد الخيط السجل في قاعدة البيانات).
+    """
+    transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job_id))
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        # كل خيط يفتح اتصاله الخاص بقاعدة البيانات
+        close_old_connections()
+
+
+def run_job(job_id):
+    """
+    ينفّذ مهمة واحدة: يحجزها (Pending → Running) ثم يجري الاستدلال ويحفظ النتيجة أو الخطأ.
+    الحجز عبر UPDATE شرطي يضمن ألا تُنفَّذ المهمة مرتين (مجمّع الخيوط وأمر الإدارة مثلاً).
+    """
+    claimed = DiagnosisJob.objects.filter(
+        id=job_id, status=DiagnosisJob.STATUS_PENDING
+    ).update(status=DiagnosisJob.STATUS_RUNNING, updated_at=timezone.now())
+    if not claimed:
+        return
+
+    job = DiagnosisJob.objects.get(id=job_id)
+    image = bytes(job.image_data)
+    prepared = None
+    if job.image_width and job.image_height:
+        prepared = PreparedImage(
+            image,
+            (job.original_width, job.original_height),
+            (job.image_width, job.image_height)
+        )
+
+    try:
+        detector = get_detector()
+        job.result = run_inference(detector, image, prepared)
+        job.status = DiagnosisJob.STATUS_COMPLETED
+        history.record_image(job.user_id, job.pet_id, job.result, model_version=detector.model_version)
+    except DiagnosisError as e:
+        job.error = e.detail
+        job.status = DiagnosisJob.STATUS_FAILED
+    except Exception as e:
+        logger.exception(f"Diagnosis job {job_id} failed unexpectedly.")
+        job.error = str(e)
+        job.status = DiagnosisJob.STATUS_FAILED
+
+    # لم نعد بحاجة إلى الصورة بعد انتهاء المهمة
+    job.image_data = b''
+    job.save(update_fields=['status', 'result', 'error', 'image_data', 'updated_at'])
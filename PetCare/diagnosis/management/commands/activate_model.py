@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from diagnosis.ml_model import registry
+
+
+class Command(BaseCommand):
+    help = "Activate a diagnosis model version (model/<version>/). Running workers pick it up without a restart."
+
+    def add_arguments(self, parser):
+        parser.add_argument('version', nargs='?', help="Version directory name inside model/, e.g. v2.")
+        parser.add_argument('--list', action='store_true', help="List available versions and the active one.")
+
+    def handle(self, *args, **options):
+        version = options['version']
+        if options['list'] or not version:
+            bundle = registry.active()
+            for name in registry.versions():
+                marker = "*" if bundle is not None and bundle.version == name else " "
+                self.stdout.write(f"{marker} {name}")
+            return
+
+        try:
+            registry.activate(version)
+        except (ValueError, RuntimeError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Model version '{version}' activated."))
@@ -0,0 +1,98 @@
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from diagnosis import benchmark
+from diagnosis.ml_model import registry
+from diagnosis.registry import NPZ_MODEL_FILE
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark symptom-diagnosis inference (p50/p95/p99 latency and throughput, single-row and batched) "
+        "on random and realistic symptom vectors, and write the results to JSON for comparison across commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('version', nargs='?', help="Model version inside model/ (default: the active one).")
+        parser.add_argument('--iterations', type=int, default=2000, help="Symptom vectors per input kind.")
+        parser.add_argument('--batch-sizes', default="8,32,100", help="Comma-separated batch sizes.")
+        parser.add_argument('--backends', default="numpy,sklearn", help="Comma-separated: numpy, sklearn.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default="diagnosis_bench.json", help="JSON results file.")
+        parser.add_argument('--compare', help="Previous results JSON to compare p50 and throughput against.")
+
+    def handle(self, *args, **options):
+        version = options['version'] or registry._read_current()
+        if not version or version not in registry.versions():
+            raise CommandError(f"Unknown model version '{version}'. Available: {', '.join(registry.versions())}")
+
+        batch_sizes = [int(size) for size in options['batch_sizes'].split(',') if size]
+        backends = [name.strip() for name in options['backends'].split(',') if name.strip()]
+        if not os.path.exists(os.path.join(registry.root, version, NPZ_MODEL_FILE)) and "numpy" in backends:
+            self.stderr.write(f"No {NPZ_MODEL_FILE} for {version}; skipping the numpy backend.")
+            backends.remove("numpy")
+
+        results = {
+            "commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "model_version": version,
+            "iterations": options['iterations'],
+            "seed": options['seed'],
+            "results": {},
+        }
+
+        for backend in backends:
+            bundle = benchmark.load_bundle(version, backend)
+            rng = np.random.default_rng(options['seed'])
+            inputs = {
+                "random": benchmark.random_inputs(bundle.features, options['iterations'], rng),
+                "realistic": benchmark.realistic_inputs(bundle, options['iterations'], rng),
+            }
+            for kind, vectors in inputs.items():
+                rows = {"single": benchmark.measure_single(bundle, vectors)}
+                for size in batch_sizes:
+                    rows[f"batch_{size}"] = benchmark.measure_batch(bundle, vectors, size)
+                results["results"][f"{backend}/{kind}"] = rows
+
+        with open(options['output'], "w") as fh:
+            json.dump(results, fh, indent=2)
+
+        previous = None
+        if options['compare']:
+            with open(options['compare']) as fh:
+                previous = json.load(fh)["results"]
+
+        self.stdout.write(f"{'scenario':<34} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'rows/s':>11}")
+        for scenario, rows in results["results"].items():
+            for name, row in rows.items():
+                line = (
+                    f"{scenario + ' ' + name:<34} {row['p50_us']:>9} {row['p95_us']:>9} "
+                    f"{row['p99_us']:>9} {row['throughput_per_s']:>11}"
+                )
+                old = (previous or {}).get(scenario, {}).get(name)
+                if old:
+                    line += (
+                        f"   p50 {(row['p50_us'] / old['p50_us'] - 1) * 100:+.1f}%"
+                        f"  rows/s {(row['throughput_per_s'] / old['throughput_per_s'] - 1) * 100:+.1f}%"
+                    )
+                self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,59 @@
+import random
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from diagnosis import ml_model
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark: SymptomEncoder vs the pandas DataFrame encoding path of ml_model.predict."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000, help="Number of timed calls per path.")
+        parser.add_argument('--symptoms', type=int, default=6, help="Active symptoms per random input.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        bundle = ml_model.get_bundle()
+        if bundle is None:
+            raise CommandError("The ML model failed to load; nothing to benchmark.")
+
+        features = bundle.features
+        encoder = bundle.symptom_encoder
+        model = bundle.model
+
+        rng = random.Random(options['seed'])
+        active = min(options['symptoms'], len(features))
+        inputs = [
+            {name: 1 for name in rng.sample(features, active)}
+            for _ in range(options['iterations'])
+        ]
+
+        def dataframe_path(symptoms):
+            return pd.DataFrame([symptoms], columns=features).fillna(0).clip(0, 1)
+
+        # 1. التحقق من التطابق قبل القياس
+        for symptoms in inputs[:500]:
+            expected = dataframe_path(symptoms).to_numpy(dtype=np.float64)
+            if not np.array_equal(expected, encoder.encode(symptoms)):
+                raise CommandError(f"Encoder output differs from the DataFrame path for {symptoms}.")
+            if not np.allclose(model.predict_proba(dataframe_path(symptoms)), model.predict_proba(encoder.encode(symptoms))):
+                raise CommandError(f"Model probabilities differ between paths for {symptoms}.")
+        self.stdout.write(self.style.SUCCESS("Outputs identical on 500 random inputs."))
+
+        # 2. القياس
+        results = [
+            ("encode (DataFrame)", lambda s: dataframe_path(s)),
+            ("encode (SymptomEncoder)", lambda s: encoder.encode(s)),
+            ("encode+predict_proba (DataFrame)", lambda s: model.predict_proba(dataframe_path(s))),
+            ("encode+predict_proba (SymptomEncoder)", lambda s: model.predict_proba(encoder.encode(s))),
+        ]
+        for label, fn in results:
+            start = time.perf_counter()
+            for symptoms in inputs:
+                fn(symptoms)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{label:<40} {elapsed / len(inputs) * 1e6:10.1f} us/call")
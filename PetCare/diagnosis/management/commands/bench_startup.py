@@ -0,0 +1,91 @@
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# (label, extra environment) for every loading mode that is compared
+MODES = [
+    ("lazy (no warm-up)", {"GUNICORN_PRELOAD": "False", "DIAGNOSIS_WARM_UP": "False", "DIAGNOSIS_MODEL_MMAP": "False"}),
+    ("per-worker load", {"GUNICORN_PRELOAD": "False", "DIAGNOSIS_MODEL_MMAP": "False"}),
+    ("preload in master", {"GUNICORN_PRELOAD": "True", "DIAGNOSIS_MODEL_MMAP": "False"}),
+    ("preload + mmap", {"GUNICORN_PRELOAD": "True", "DIAGNOSIS_MODEL_MMAP": "True"}),
+]
+
+READY_RE = re.compile(r"Worker ready \(pid: (\d+)\)")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _memory_kb(pid):
+    """Rss / Pss / private pages of a process from /proc/<pid>/smaps_rollup (Linux)."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as fh:
+        for line in fh:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "private": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+class Command(BaseCommand):
+    help = "Startup benchmark: gunicorn boot time and per-worker memory for each diagnosis model loading mode."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--timeout', type=float, default=120.0, help="Seconds to wait for all workers to boot.")
+
+    def handle(self, *args, **options):
+        if not os.path.exists("/proc/self/smaps_rollup"):
+            raise CommandError("This benchmark reads /proc/<pid>/smaps_rollup and only runs on Linux.")
+
+        workers = options['workers']
+        self.stdout.write(f"{'mode':<20} {'boot (s)':>9} {'master RSS':>11} {'worker RSS':>11} {'worker PSS':>11} {'worker private':>15}  (KiB, worker = mean)")
+        for label, extra_env in MODES:
+            boot, master, worker_stats = self._run(extra_env, workers, options['timeout'])
+            mean = {key: sum(s[key] for s in worker_stats) // len(worker_stats) for key in ("rss", "pss", "private")}
+            self.stdout.write(
+                f"{label:<20} {boot:>9.2f} {master['rss']:>11} {mean['rss']:>11} {mean['pss']:>11} {mean['private']:>15}"
+            )
+
+    def _run(self, extra_env, workers, timeout):
+        env = {**os.environ, **extra_env, "WEB_CONCURRENCY": str(workers), "PORT": str(_free_port())}
+        cmd = [sys.executable, "-m", "gunicorn", "PetCare.wsgi:application", "--config", "gunicorn.conf.py"]
+
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=settings.BASE_DIR, env=env, stderr=subprocess.PIPE, text=True)
+        ready = set()
+        all_ready = threading.Event()
+
+        def read_log():
+            for line in proc.stderr:
+                match = READY_RE.search(line)
+                if match:
+                    ready.add(int(match.group(1)))
+                    if len(ready) == workers:
+                        all_ready.set()
+
+        threading.Thread(target=read_log, daemon=True).start()
+        try:
+            if not all_ready.wait(timeout):
+                raise CommandError(f"Only {len(ready)}/{workers} gunicorn workers booted within {timeout}s.")
+            boot = time.perf_counter() - start
+            # let the freshly forked workers settle before sampling memory
+            time.sleep(1.0)
+            return boot, _memory_kb(proc.pid), [_memory_kb(pid) for pid in ready]
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
@@ -0,0 +1,85 @@
+import os
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from diagnosis.ml_model import MODEL_DIR, registry
+from diagnosis.numpy_svm import NumpyCalibratedSVM, export_calibrated_svm
+from diagnosis.registry import ENCODER_FILE, FEATURES_FILE, NPZ_MODEL_FILE, SVM_MODEL_FILE
+
+
+class Command(BaseCommand):
+    help = (
+        "Export a diagnosis model version (model/<version>/svm_model.pkl) to svm_model.npz for the "
+        "NumPy-only evaluator, after checking it reproduces sklearn's predict_proba."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('version', nargs='?', help="Version directory name inside model/ (default: the active one).")
+        parser.add_argument('--samples', type=int, default=5000, help="Random symptom rows used for the check.")
+        parser.add_argument('--tolerance', type=float, default=1e-9, help="Maximum allowed absolute probability difference.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        import joblib
+
+        version = options['version'] or registry._read_current()
+        if not version or version not in registry.versions():
+            raise CommandError(f"Unknown model version '{version}'. Available: {', '.join(registry.versions())}")
+
+        path = os.path.join(MODEL_DIR, version)
+        model = joblib.load(os.path.join(path, SVM_MODEL_FILE))
+        features = joblib.load(os.path.join(path, FEATURES_FILE))
+        labels = joblib.load(os.path.join(path, ENCODER_FILE)).classes_
+
+        # كتابة في ملف مؤقت ثم إعادة تسمية بعد التحقق، فلا تلتقط العمليات الأخرى ملفاً غير مُتحقق منه
+        npz_path = os.path.join(path, NPZ_MODEL_FILE)
+        tmp_path = f"{npz_path}.{os.getpid()}.tmp.npz"
+        try:
+            export_calibrated_svm(model, features, labels, tmp_path)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        try:
+            evaluator = NumpyCalibratedSVM.load(tmp_path)
+
+            # صفوف عشوائية ثنائية + الصف الفارغ + كل عرض بمفرده + قيم غير ثنائية
+            rng = np.random.default_rng(options['seed'])
+            n_features = len(features)
+            X = np.vstack([
+                (rng.random((options['samples'], n_features)) < 0.08).astype(np.float64),
+                np.zeros((1, n_features)),
+                np.eye(n_features),
+                rng.random((100, n_features)),
+            ])
+            expected = model.predict_proba(X)
+            actual = evaluator.predict_proba(X)
+
+            max_diff = float(np.abs(expected - actual).max())
+            same_argmax = bool((expected.argmax(axis=1) == actual.argmax(axis=1)).all())
+            if max_diff > options['tolerance'] or not same_argmax:
+                raise CommandError(
+                    f"NumPy evaluator does not reproduce sklearn: max |diff| = {max_diff:.3e}, "
+                    f"same top disease for all rows: {same_argmax}."
+                )
+
+            os.replace(tmp_path, npz_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        row = X[:1]
+        timings = {}
+        for name, fn in (("sklearn", model.predict_proba), ("numpy", evaluator.predict_proba)):
+            fn(row)
+            start = time.perf_counter()
+            for _ in range(500):
+                fn(row)
+            timings[name] = (time.perf_counter() - start) / 500 * 1e6
+
+        self.stdout.write(
+            f"Checked {len(X)} rows: max |diff| = {max_diff:.3e}, top disease identical for every row.\n"
+            f"Single-row predict_proba: sklearn {timings['sklearn']:.1f} us, numpy {timings['numpy']:.1f} us."
+        )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {npz_path} ({os.path.getsize(npz_path)} bytes)."))
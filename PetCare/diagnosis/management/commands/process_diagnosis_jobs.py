@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from diagnosis.jobs import run_job
+from diagnosis.models import DiagnosisJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Run image-diagnosis jobs left pending, e.g. after a restart. Jobs stuck in 'Running' "
+        "longer than --stale-minutes (their worker died) are re-queued first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-minutes', type=int, default=10)
+
+    def handle(self, *args, **options):
+        stale_before = timezone.now() - timedelta(minutes=options['stale_minutes'])
+        requeued = DiagnosisJob.objects.filter(
+            status=DiagnosisJob.STATUS_RUNNING, updated_at__lt=stale_before
+        ).update(status=DiagnosisJob.STATUS_PENDING)
+
+        pending = list(
+            DiagnosisJob.objects.filter(status=DiagnosisJob.STATUS_PENDING)
+            .order_by('created_at')
+            .values_list('id', flat=True)
+        )
+        for job_id in pending:
+            run_job(job_id)
+
+        self.stdout.write(self.style.SUCCESS(f"Re-queued {requeued} stale job(s), processed {len(pending)} pending job(s)."))
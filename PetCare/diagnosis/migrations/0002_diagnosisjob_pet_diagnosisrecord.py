@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagnosis', '0001_initial'),
+        ('pets', '0010_remove_pet_qr_code_image_alter_pet_qr_token_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diagnosisjob',
+            name='pet',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='diagnosis_jobs', to='pets.pet'),
+        ),
+        migrations.CreateModel(
+            name='DiagnosisRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('symptoms', 'Symptoms'), ('image', 'Image')], max_length=10)),
+                ('model_version', models.CharField(blank=True, max_length=100)),
+                ('symptoms', models.JSONField(blank=True, null=True)),
+                ('disease', models.CharField(blank=True, max_length=150)),
+                ('confidence', models.FloatField(blank=True, null=True)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('cached', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('pet', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='diagnosis_records', to='pets.pet')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='diagnosis_records', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Diagnosis Record',
+                'verbose_name_plural': 'Diagnosis Records',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['pet', '-created_at'], name='diagnosis_d_pet_id_0191d0_idx')],
+            },
+        ),
+    ]
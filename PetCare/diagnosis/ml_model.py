@@ -1,66 +1,158 @@
-import joblib
-import pandas as pd
 import numpy as np
 import os
-import sys
 
-# --- تحديد المسارات وتحميل النموذج ---
+from django.conf import settings
+
+from .registry import ModelRegistry
+
+# --- تحديد المسارات وسجل إصدارات النموذج ---
 
 # المسارات النسبية: يفترض أن مجلد 'model' يقع في جذر المشروع، بجوار مجلد 'diagnosis'
-try:
-    # الحصول على جذر المشروع (PetCare/)
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    MODEL_DIR = os.path.join(BASE_DIR, 'model')
-    
-    # تحديد المسارات الكاملة للملفات
-    SVM_MODEL_PATH = os.path.join(MODEL_DIR, "svm_model.pkl")
-    FEATURES_PATH = os.path.join(MODEL_DIR, "features.pkl")
-    ENCODER_PATH = os.path.join(MODEL_DIR, "disease_label_encoder.pkl")
-    
-    # تحميل المكونات
-    # ملاحظة: تم افتراض أن اسم ملف النموذج هو "svm_model.pkl" كما في مناقشتنا السابقة.
-    model = joblib.load(SVM_MODEL_PATH) 
-    features = joblib.load(FEATURES_PATH)
-    encoder = joblib.load(ENCODER_PATH)
-    MODEL_LOADED = True
-    print("✅ ML model components loaded successfully.")
-
-except Exception as e:
-    # في حال فشل التحميل، يتم تعيين المتغيرات إلى None وإيقاف التحميل
-    print(f"ERROR: Failed to load ML model files: {e}. Check 'model/' directory path and contents.")
-    model, features, encoder = None, None, None
-    MODEL_LOADED = False
+# الحصول على جذر المشروع (PetCare/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# كل إصدار في مجلد مستقل: model/<version>/{svm_model.pkl, features.pkl, disease_label_encoder.pkl}
+# والإصدار النشط مكتوب في model/CURRENT
+MODEL_DIR = os.path.join(BASE_DIR, 'model')
+
+# تحميل مصفوفات النموذج عبر memory-map (للقراءة فقط) بدلاً من نسخها في ذاكرة كل عملية،
+# فتتشارك كل عمليات gunicorn نفس صفحات الملف.
+MODEL_MMAP_MODE = 'r' if getattr(settings, 'DIAGNOSIS_MODEL_MMAP', False) else None
+
+registry = ModelRegistry(
+    MODEL_DIR,
+    # أقل مدة (بالثواني) بين فحصين لملف CURRENT (التبديل إلى إصدار جديد دون إعادة تشغيل)
+    check_interval=getattr(settings, 'DIAGNOSIS_MODEL_CHECK_INTERVAL', 2.0),
+    mmap_mode=MODEL_MMAP_MODE,
+    # ذاكرة LRU لنتائج التشخيص لكل إصدار، مفتاحها bitset متجه الأعراض
+    cache_size=getattr(settings, 'DIAGNOSIS_CACHE_SIZE', 4096),
+    # تفضيل svm_model.npz (مقيّم NumPy بدون sklearn) على ملفات pickle عند وجوده في مجلد الإصدار
+    prefer_npz=getattr(settings, 'DIAGNOSIS_MODEL_NPZ', True),
+)
+
+# لا يُحمَّل أي إصدار عند استيراد هذه الوحدة: التحميل عند أول طلب تشخيص، أو مسبقاً عبر warm_up()
+
+
+def warm_up():
+    """
+    يحمّل الإصدار النشط من النموذج مسبقاً (مثلاً في عملية gunicorn الرئيسية قبل fork)
+    حتى لا يدفع أول طلب تشخيص كلفة التحميل. يعيد ModelBundle أو None.
+    """
+    bundle = registry.active()
+    if bundle is not None:
+        print(f"✅ ML model components loaded successfully (version {bundle.version}, {bundle.backend} backend).")
+    else:
+        print(f"ERROR: Failed to load ML model files: {registry.last_error}. Check 'model/' directory path and contents.")
+    return bundle
+
+
+def get_bundle():
+    """
+    الإصدار النشط من النموذج (ModelBundle) أو None إذا تعذّر تحميل أي إصدار.
+    يأخذ الطلب نسخة واحدة ويستخدمها حتى نهايته، فلا يتأثر بتبديل الإصدار أثناءه.
+    """
+    return registry.active()
+
+
+def cache_info():
+    """عدّادات ذاكرة نتائج التشخيص للإصدار النشط: hits, misses, size, maxsize."""
+    bundle = get_bundle()
+    return bundle.cache.info() if bundle is not None else None
+
 
 # --- دالة التنبؤ ---
 
-def predict(symptoms: dict):
+def predict(symptoms: dict, bundle=None):
     """
     تجري تنبؤاً بالمرض بناءً على الأعراض المدخلة باستخدام النموذج المحلي.
-    
+
     المدخلات:
         symptoms (dict): قاموس يحتوي على الأعراض الملاحظة (مثلاً: {"Fever": 1}).
-                         
+        bundle (ModelBundle): إصدار النموذج المستخدم (افتراضياً الإصدار النشط).
+
     المخرجات:
         tuple: (اسم المرض المتوقع - str, نسبة الثقة في التوقع - float)
     """
-    if not MODEL_LOADED:
+    bundle = bundle or get_bundle()
+    if bundle is None:
         return "خطأ في تحميل النموذج", 0.0
 
-    # 1. إنشاء DataFrame باستخدام القائمة الكاملة للميزات
-    # يتم ملء الأعراض غير المذكورة بـ 0 تلقائياً
-    X = pd.DataFrame([symptoms], columns=features).fillna(0)
-
-    # 2. التأكد من أن القيم محصورة بين 0 و 1 (لبيانات الإدخال الثنائية)
-    X = X.clip(0, 1)
+    # 1+2. ترميز الأعراض مباشرة في صف NumPy بالقائمة الكاملة للميزات
+    # (الأعراض غير المذكورة = 0، والقيم محصورة بين 0 و 1)
+    X = bundle.symptom_encoder.encode(symptoms)
 
-    # 3. التنبؤ بالاحتمالات
-    probs = model.predict_proba(X)[0]
+    # 3. التنبؤ بالاحتمالات (من الذاكرة إن كانت هذه التركيبة قد شُخّصت سابقاً)
+    probs = bundle.predict_proba(X)[0]
 
     # 4. الحصول على فهرس أعلى احتمال
     idx = np.argmax(probs)
 
     # 5. تحويل الفهرس إلى اسم المرض ونسبة الثقة
-    disease = encoder.inverse_transform([idx])[0]
+    disease = bundle.labels[idx]
     confidence = probs[idx]
 
-    return disease, float(confidence)
\ No newline at end of file
+    return disease, float(confidence)
+
+
+def predict_batch(symptoms_list: list, bundle=None):
+    """
+    تشخيص دفعة من الحيوانات في استدعاء واحد.
+
+    تُبنى مصفوفة ميزات واحدة لكل الصفوف ثم يُستدعى predict_proba مرة واحدة،
+    فتنخفض كلفة الحيوان الواحد كلما كبرت الدفعة.
+
+    المدخلات:
+        symptoms_list (list): قائمة من قواميس الأعراض بنفس صيغة predict.
+        bundle (ModelBundle): إصدار النموذج المستخدم (افتراضياً الإصدار النشط).
+
+    المخرجات:
+        list: قائمة من (اسم المرض - str, نسبة الثقة - float) بنفس ترتيب المدخلات،
+              أو None إذا لم يتم تحميل النموذج.
+    """
+    bundle = bundle or get_bundle()
+    if bundle is None:
+        return None
+
+    if not symptoms_list:
+        return []
+
+    # مصفوفة واحدة لكل الدفعة بنفس معالجة predict (ملء الناقص بـ 0 ثم الحصر بين 0 و 1)
+    X = bundle.symptom_encoder.encode_batch(symptoms_list)
+
+    probs = bundle.predict_proba(X)
+    idx = np.argmax(probs, axis=1)
+
+    diseases = bundle.labels[idx]
+    confidences = probs[np.arange(len(idx)), idx]
+
+    return [(disease, float(confidence)) for disease, confidence in zip(diseases, confidences)]
+
+
+def predict_top_k(symptoms_list: list, top_k: int, bundle=None):
+    """
+    التشخيص التفريقي: أعلى top_k أمراض احتمالاً لكل حيوان في الدفعة.
+
+    يستخدم نفس تمريرة predict_proba (والذاكرة) التي يستخدمها predict_batch، فالمعلومة
+    الإضافية لا تكلف سوى ترتيب صف من n_classes قيمة.
+
+    المخرجات:
+        list: لكل حيوان قائمة من (اسم المرض - str, الاحتمال - float) مرتبة تنازلياً،
+              أولها هو نفس نتيجة predict؛ أو None إذا لم يتم تحميل النموذج.
+    """
+    bundle = bundle or get_bundle()
+    if bundle is None:
+        return None
+
+    if not symptoms_list:
+        return []
+
+    X = bundle.symptom_encoder.encode_batch(symptoms_list)
+    probs = bundle.predict_proba(X)
+
+    # ترتيب مستقر حتى يطابق أول عنصر نتيجة argmax عند تساوي الاحتمالات
+    top = np.argsort(-probs, axis=1, kind='stable')[:, :min(top_k, bundle.n_classes)]
+
+    return [
+        [(bundle.labels[i], float(row_probs[i])) for i in row_top]
+        for row_probs, row_top in zip(probs, top)
+    ]
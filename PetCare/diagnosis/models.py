@@ -1,3 +1,112 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+class DiagnosisJob(models.Model):
+    """
+    مهمة تشخيص بالصور غير متزامنة: يُعاد معرّفها فوراً ويجري الاستدلال البعيد في الخلفية،
+    وتُحفظ النتيجة في قاعدة البيانات فتبقى متاحة بعد إعادة تشغيل الخادم.
+    """
+    STATUS_PENDING = 'Pending'
+    STATUS_RUNNING = 'Running'
+    STATUS_COMPLETED = 'Completed'
+    STATUS_FAILED = 'Failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='diagnosis_jobs'
+    )
+    # الحيوان المعني (اختياري)، يُنسخ إلى سجل التشخيص عند انتهاء المهمة
+    pet = models.ForeignKey(
+        'pets.Pet',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='diagnosis_jobs'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+
+    # الصورة الجاهزة للإرسال (بعد المعالجة المسبقة)، تُفرَّغ بعد انتهاء المهمة
+    image_data = models.BinaryField(blank=True)
+    # أبعاد الصورة الأصلية والمرسلة لإعادة الإحداثيات إلى إطار الأصل (فارغة بدون معالجة مسبقة)
+    original_width = models.PositiveIntegerField(null=True, blank=True)
+    original_height = models.PositiveIntegerField(null=True, blank=True)
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Diagnosis Job"
+        verbose_name_plural = "Diagnosis Jobs"
+
+    def __str__(self):
+        return f"Diagnosis job {self.id} ({self.status})"
+
+
+class DiagnosisRecord(models.Model):
+    """
+    سجل دائم لكل تشخيص (بالأعراض أو بالصور) لمراجعته لاحقاً ومعرفة المدخلات الأكثر تكراراً.
+    لا يُحفظ مباشرة في الطلب: يُكتب عبر diagnosis.history (مخزن مؤقت + bulk_create).
+    """
+    KIND_SYMPTOMS = 'symptoms'
+    KIND_IMAGE = 'image'
+    KIND_CHOICES = (
+        (KIND_SYMPTOMS, 'Symptoms'),
+        (KIND_IMAGE, 'Image'),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='diagnosis_records'
+    )
+    pet = models.ForeignKey(
+        'pets.Pet',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='diagnosis_records'
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    model_version = models.CharField(max_length=100, blank=True)
+
+    # الأعراض المُدخلة (بالأعراض فقط): القيم غير الصفرية فقط
+    symptoms = models.JSONField(null=True, blank=True)
+    disease = models.CharField(max_length=150, blank=True)
+    confidence = models.FloatField(null=True, blank=True)
+    # النتيجة الكاملة: التشخيص التفريقي أو توقعات الصورة
+    result = models.JSONField(null=True, blank=True)
+    cached = models.BooleanField(default=False)
+
+    # وقت التشخيص نفسه لا وقت الكتابة المؤجلة (لذلك ليس auto_now_add)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['pet', '-created_at']),
+        ]
+        verbose_name = "Diagnosis Record"
+        verbose_name_plural = "Diagnosis Records"
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.get_kind_display()} diagnosis: {self.disease or '-'} ({self.created_at:%Y-%m-%d %H:%M})"
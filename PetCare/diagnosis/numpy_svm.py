@@ -0,0 +1,120 @@
+import numpy as np
+
+# إصدار صيغة ملف .npz (يُرفع عند تغيير المصفوفات المحفوظة)
+FORMAT_VERSION = 1
+
+
+def export_calibrated_svm(model, features, labels, path):
+    """
+    يستخرج من CalibratedClassifierCV (مصنف خطي + معايرة sigmoid/Platt) كل ما يلزم
+    لحساب predict_proba، ويحفظه في ملف .npz مضغوط بدون pickle.
+
+    المدخلات:
+        model: CalibratedClassifierCV مدرَّب، مقدّراته خطية (coef_ و intercept_) مثل LinearSVC.
+        features (list): أسماء الميزات بترتيب أعمدة النموذج.
+        labels (list): أسماء الأمراض بترتيب أعمدة predict_proba.
+        path (str): مسار ملف .npz الناتج.
+
+    يرفع ValueError إذا لم يكن النموذج من هذا النوع.
+    """
+    coef, intercept, platt_a, platt_b, class_index = [], [], [], [], []
+    n_classes = len(model.classes_)
+
+    for calibrated in model.calibrated_classifiers_:
+        if calibrated.method != 'sigmoid':
+            raise ValueError(f"Only sigmoid calibration is supported, got '{calibrated.method}'.")
+        estimator = calibrated.estimator
+        if not hasattr(estimator, 'coef_'):
+            raise ValueError(f"Only linear estimators are supported, got {type(estimator).__name__}.")
+
+        coef.append(np.asarray(estimator.coef_, dtype=np.float64))
+        intercept.append(np.asarray(estimator.intercept_, dtype=np.float64))
+        platt_a.append([c.a_ for c in calibrated.calibrators])
+        platt_b.append([c.b_ for c in calibrated.calibrators])
+        # عمود كل مُعايِر في مصفوفة الاحتمالات (كما يحسبه sklearn عبر LabelEncoder)
+        indices = np.searchsorted(calibrated.classes, estimator.classes_)
+        if n_classes == 2:
+            indices = indices[:1] + 1
+        class_index.append(indices)
+
+    np.savez_compressed(
+        path,
+        format_version=np.int64(FORMAT_VERSION),
+        coef=np.stack(coef),
+        intercept=np.stack(intercept),
+        platt_a=np.asarray(platt_a, dtype=np.float64),
+        platt_b=np.asarray(platt_b, dtype=np.float64),
+        class_index=np.asarray(class_index, dtype=np.int64),
+        n_classes=np.int64(n_classes),
+        features=np.asarray([str(f) for f in features]),
+        labels=np.asarray([str(label) for label in labels]),
+    )
+
+
+class NumpyCalibratedSVM:
+    """
+    مقيّم NumPy فقط لنموذج مُصدَّر عبر export_calibrated_svm: يعيد نفس احتمالات
+    CalibratedClassifierCV.predict_proba دون استيراد sklearn ودون كلفة التحقق من المدخلات
+    التي تطغى على زمن التنبؤ لصف واحد.
+
+    الحساب لكل fold:  scores = X @ coef.T + intercept
+                      p = 1 / (1 + exp(a * scores + b))            (Platt)
+    ثم التطبيع لكل صف (أو توزيع منتظم إذا كان المجموع صفراً) ومتوسط كل الـ folds.
+    """
+
+    def __init__(self, coef, intercept, platt_a, platt_b, class_index, n_classes, features, labels):
+        self.coef = coef
+        self.intercept = intercept
+        self.platt_a = platt_a
+        self.platt_b = platt_b
+        self.class_index = class_index
+        self.n_classes = int(n_classes)
+        self.features = [str(f) for f in features]
+        self.labels = [str(label) for label in labels]
+        self.classes_ = np.arange(self.n_classes)
+        self.n_features_in_ = coef.shape[2]
+        # (folds * classes, features) لضرب مصفوفات واحد بدل حلقة على الـ folds
+        self._weights = np.ascontiguousarray(coef.reshape(-1, coef.shape[2]).T)
+        self._bias = intercept.reshape(-1)
+        self._rows = np.arange(coef.shape[0])[:, None]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format_version']) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported model.npz format version {int(data['format_version'])}.")
+            return cls(
+                coef=data['coef'],
+                intercept=data['intercept'],
+                platt_a=data['platt_a'],
+                platt_b=data['platt_b'],
+                class_index=data['class_index'],
+                n_classes=data['n_classes'],
+                features=data['features'],
+                labels=data['labels'],
+            )
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        n_folds, n_calibrators = self.platt_a.shape
+
+        scores = (X @ self._weights + self._bias).reshape(len(X), n_folds, n_calibrators)
+        with np.errstate(over='ignore'):
+            calibrated = 1.0 / (1.0 + np.exp(self.platt_a * scores + self.platt_b))
+
+        # (folds, samples, classes)
+        proba = np.zeros((n_folds, len(X), self.n_classes))
+        proba[self._rows, :, self.class_index] = calibrated.transpose(1, 2, 0)
+
+        if self.n_classes == 2:
+            proba[:, :, 0] = 1.0 - proba[:, :, 1]
+        else:
+            denominator = proba.sum(axis=2, keepdims=True)
+            proba = np.divide(
+                proba, denominator,
+                out=np.full_like(proba, 1.0 / self.n_classes),
+                where=denominator != 0
+            )
+        proba[(1.0 < proba) & (proba <= 1.0 + 1e-5)] = 1.0
+
+        return proba.mean(axis=0)
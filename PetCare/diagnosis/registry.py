@@ -0,0 +1,240 @@
+import logging
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from .cache import DiagnosisCache
+from .encoder import SymptomEncoder
+
+logger = logging.getLogger(__name__)
+
+# أسماء ملفات النموذج داخل كل مجلد إصدار: model/<version>/
+SVM_MODEL_FILE = "svm_model.pkl"
+FEATURES_FILE = "features.pkl"
+ENCODER_FILE = "disease_label_encoder.pkl"
+# نفس النموذج مُصدَّراً كمصفوفات NumPy (manage.py export_model_npz)، يُفضَّل عند وجوده
+NPZ_MODEL_FILE = "svm_model.npz"
+
+# ملف نصي في جذر model/ يحتوي اسم الإصدار النشط
+CURRENT_FILE = "CURRENT"
+
+# النموذج مدرَّب على DataFrame بأسماء الأعمدة، ونحن نمرر مصفوفة NumPy بنفس ترتيب features
+warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+
+
+class ModelBundle:
+    """
+    إصدار واحد محمَّل من نموذج التشخيص بكل مكوناته، مع ذاكرة نتائج خاصة به
+    (تبديل الإصدار يعني تلقائياً ذاكرة جديدة فارغة).
+    """
+
+    def __init__(self, version, model, features, labels, cache_size=4096, backend="sklearn"):
+        self.version = version
+        self.model = model
+        self.features = features
+        # "numpy" (svm_model.npz، بدون sklearn) أو "sklearn" (ملفات pickle)
+        self.backend = backend
+        self.symptom_encoder = SymptomEncoder(features)
+        # أسماء الأمراض بترتيب أعمدة predict_proba، تُحسب مرة واحدة بدل inverse_transform في كل طلب
+        self.labels = np.asarray([str(label) for label in labels], dtype=object)
+        self.n_classes = len(self.labels)
+        self.cache = DiagnosisCache(maxsize=cache_size)
+
+    @classmethod
+    def load(cls, path, version, mmap_mode=None, cache_size=4096, prefer_npz=True):
+        npz_path = os.path.join(path, NPZ_MODEL_FILE)
+        if prefer_npz and os.path.exists(npz_path):
+            # مقيّم NumPy فقط: لا يستورد sklearn ولا joblib، ولا يفك أي pickle
+            # (mmap_mode لا ينطبق هنا: الملف مضغوط وحجمه عشرات KB)
+            from .numpy_svm import NumpyCalibratedSVM
+
+            model = NumpyCalibratedSVM.load(npz_path)
+            bundle = cls(
+                version=version,
+                model=model,
+                features=model.features,
+                labels=model.labels,
+                cache_size=cache_size,
+                backend="numpy",
+            )
+        else:
+            # joblib (ومعه sklearn عند فك النموذج) يُستورد عند أول تحميل فقط، لا عند تحميل URLconf
+            import joblib
+
+            bundle = cls(
+                version=version,
+                model=joblib.load(os.path.join(path, SVM_MODEL_FILE), mmap_mode=mmap_mode),
+                features=joblib.load(os.path.join(path, FEATURES_FILE)),
+                labels=joblib.load(os.path.join(path, ENCODER_FILE)).classes_,
+                cache_size=cache_size,
+            )
+        # تمرير صف فارغ مرة واحدة قبل التفعيل حتى لا يدفع أول طلب حقيقي كلفة التهيئة
+        bundle.model.predict_proba(np.zeros((1, bundle.symptom_encoder.n_features)))
+        return bundle
+
+    @staticmethod
+    def _bitset_key(row):
+        """
+        مفتاح الذاكرة: bitset مضغوط لصف الأعراض. الصفوف غير الثنائية (قيم بين 0 و 1)
+        لا يمكن تمثيلها بدون فقد، لذلك لا تُخزَّن.
+        """
+        if not ((row == 0.0) | (row == 1.0)).all():
+            return None
+        return np.packbits(row.astype(bool)).tobytes()
+
+    def predict_proba(self, X):
+        """
+        predict_proba مع ذاكرة LRU: الصفوف المكررة تُقرأ من الذاكرة، والباقي يُحسب
+        في استدعاء واحد للنموذج.
+        """
+        if self.cache.maxsize <= 0:
+            # الذاكرة معطلة: لا داعي لحساب مفاتيح الصفوف
+            return self.model.predict_proba(X)
+
+        keys = [self._bitset_key(row) for row in X]
+        probs = np.empty((len(X), self.n_classes), dtype=np.float64)
+
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key) if key is not None else None
+            if cached is None:
+                missing.append(i)
+            else:
+                probs[i] = cached
+
+        if missing:
+            computed = self.model.predict_proba(X[missing])
+            probs[missing] = computed
+            for i, row in zip(missing, computed):
+                if keys[i] is not None:
+                    self.cache.put(keys[i], row.copy())
+
+        return probs
+
+
+class ModelRegistry:
+    """
+    سجل إصدارات نموذج التشخيص.
+
+    كل إصدار مجلد مستقل داخل root (model/v1/، model/v2/ ...) ولا يُعدَّل بعد نشره،
+    والملف root/CURRENT يحدد الإصدار النشط. كل عملية (worker) تقرأ CURRENT كل
+    check_interval ثانية على الأكثر، وعند تغيّره تحمّل الإصدار الجديد في الخلفية
+    ثم تستبدله بالنشط دفعة واحدة، دون إعادة تشغيل ودون التأثير على الطلبات الجارية.
+    فشل التحميل لا يعطل الخدمة: يبقى الإصدار السابق نشطاً ويُسجَّل الخطأ في last_error.
+    """
+
+    def __init__(self, root, check_interval=2.0, mmap_mode=None, cache_size=4096, prefer_npz=True):
+        self.root = root
+        self.check_interval = check_interval
+        self.mmap_mode = mmap_mode
+        self.cache_size = cache_size
+        self.prefer_npz = prefer_npz
+        self.last_error = None
+        self._active = None
+        self._wanted = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def versions(self):
+        """الإصدارات المتاحة على القرص (أسماء المجلدات داخل root)."""
+        try:
+            return sorted(
+                name for name in os.listdir(self.root)
+                if os.path.isdir(os.path.join(self.root, name))
+            )
+        except OSError:
+            return []
+
+    def _read_current(self):
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as fh:
+                return fh.read().strip() or None
+        except OSError:
+            return None
+
+    def _write_current(self, version):
+        # كتابة ذرية: ملف مؤقت ثم إعادة تسمية، حتى لا تقرأ عملية أخرى ملفاً نصف مكتوب
+        path = os.path.join(self.root, CURRENT_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as fh:
+            fh.write(f"{version}\n")
+        os.replace(tmp_path, path)
+
+    def _load(self, version):
+        """يحمّل الإصدار ويفعّله. يعيد True عند النجاح."""
+        path = os.path.join(self.root, version)
+        try:
+            bundle = ModelBundle.load(
+                path, version,
+                mmap_mode=self.mmap_mode,
+                cache_size=self.cache_size,
+                prefer_npz=self.prefer_npz
+            )
+        except Exception as e:
+            self.last_error = f"{version}: {e}"
+            logger.error(f"Failed to load diagnosis model version '{version}' from {path}: {e}")
+            return False
+
+        # التبديل الذري: الطلبات الجارية تكمل بالنسخة التي أخذتها، والجديدة تأخذ هذه
+        self._active = bundle
+        self.last_error = None
+        logger.info(f"Diagnosis model version '{version}' is now active.")
+        return True
+
+    def refresh(self, force=False):
+        """
+        يقرأ CURRENT (مرة كل check_interval ثانية على الأكثر) ويحمّل الإصدار
+        المطلوب إن اختلف عن النشط.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        wanted = self._read_current()
+        if wanted is None:
+            if self._active is None:
+                self.last_error = f"No active version: {os.path.join(self.root, CURRENT_FILE)} is missing or empty."
+            return
+
+        active = self._active
+        if active is not None and active.version == wanted:
+            return
+        # لا نعيد محاولة إصدار فشل تحميله في كل فحص ما دام هناك إصدار سابق يخدم الطلبات،
+        # بل عند تغيّر CURRENT فقط. أما إن لم يُحمَّل أي إصدار بعد فنعيد المحاولة.
+        if active is not None and wanted == self._wanted and not force:
+            return
+
+        # إذا كان خيط آخر يحمّل الإصدار الآن نكمل بالإصدار الحالي بدل الانتظار
+        if not self._lock.acquire(blocking=active is None):
+            return
+        try:
+            self._wanted = wanted
+            active = self._active
+            if active is None or active.version != wanted:
+                self._load(wanted)
+        finally:
+            self._lock.release()
+
+    def active(self):
+        """الإصدار النشط حالياً (ModelBundle) أو None إذا لم يُحمَّل أي إصدار بنجاح."""
+        self.refresh()
+        return self._active
+
+    def activate(self, version):
+        """
+        يحمّل الإصدار ويفعّله في هذه العملية فوراً، ثم يكتبه في CURRENT لتلتقطه
+        بقية العمليات خلال check_interval ثانية.
+        """
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version '{version}'. Available: {', '.join(self.versions()) or 'none'}")
+
+        with self._lock:
+            if not self._load(version):
+                raise RuntimeError(self.last_error)
+            self._wanted = version
+            self._write_current(version)
+        return self._active
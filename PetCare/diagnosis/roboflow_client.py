@@ -0,0 +1,169 @@
+import base64
+import importlib.util
+import logging
+import threading
+import time
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# ذاكرة على مستوى العملية: model_endpoint ← (مقبض النموذج, وقت انتهاء الصلاحية)
+_model_cache = {}
+_model_cache_lock = threading.Lock()
+
+
+def sdk_available():
+    """
+    هل مكتبة Roboflow مثبتة؟ (دون استيرادها)
+    هذا يسمح للبرنامج بالعمل حتى لو لم يتم تثبيت roboflow، ولكنه يفشل نقطة النهاية الخاصة بالصور.
+    """
+    return importlib.util.find_spec('roboflow') is not None
+
+
+def import_sdk():
+    """
+    يستورد SDK الخاص بـ Roboflow عند أول استخدام فقط: استيراده يسحب مكتبات كثيرة
+    ولا تحتاجه العمليات التي لا تخدم التشخيص بالصور.
+    """
+    from roboflow import Roboflow
+    return Roboflow
+
+
+def parse_model_endpoint(model_endpoint):
+    """
+    يفصل 'workspace_name/project_name/version_id' إلى أجزائه.
+    يرفع ValueError إذا كانت الصيغة غير صحيحة.
+    """
+    project_path, version_id = model_endpoint.rsplit('/', 1)
+    workspace_name, project_slug = project_path.split('/', 1)
+    return workspace_name, project_slug, int(version_id)
+
+
+def _resolve_model(api_key, model_endpoint):
+    # المصادقة والتحميل باستخدام SDK: عدة طلبات شبكة (workspace → project → version → model)
+    workspace_name, project_slug, version_id = parse_model_endpoint(model_endpoint)
+    rf = import_sdk()(api_key=api_key)
+    workspace = rf.workspace(workspace_name)
+    project = workspace.project(project_slug)
+    return project.version(version_id).model
+
+
+def get_model(api_key, model_endpoint, ttl=3600):
+    """
+    يعيد مقبض نموذج Roboflow الجاهز للاستدلال، مع تخزينه مؤقتاً على مستوى العملية
+    (مفتاحه model_endpoint) لمدة ttl ثانية، فلا يدفع كل طلب كلفة الطلبات التمهيدية.
+
+    التهيئة كسولة وآمنة بين الخيوط: خيط واحد فقط يعيد حل المقبض عند انتهاء صلاحيته.
+    إذا فشل التحديث ولدينا مقبض سابق نستمر باستخدامه ونعيد المحاولة لاحقاً.
+    """
+    now = time.monotonic()
+    entry = _model_cache.get(model_endpoint)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+
+    with _model_cache_lock:
+        # ربما حدّثه خيط آخر أثناء انتظارنا للقفل
+        entry = _model_cache.get(model_endpoint)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        try:
+            model = _resolve_model(api_key, model_endpoint)
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning(f"Refreshing Roboflow model handle failed, keeping the previous one: {e}")
+            # إعادة المحاولة بعد دقيقة بدل كل طلب
+            _model_cache[model_endpoint] = (entry[0], now + min(ttl, 60))
+            return entry[0]
+
+        _model_cache[model_endpoint] = (model, now + ttl)
+        return model
+
+
+def invalidate_model(model_endpoint):
+    """يحذف المقبض المخزّن (مثلاً بعد فشل الاستدلال) ليُعاد حله في الطلب التالي."""
+    with _model_cache_lock:
+        _model_cache.pop(model_endpoint, None)
+
+
+# أنواع مقابض النماذج في SDK التي تعيد توقعات بصناديق (x, y, width, height) كما يعالجها التشخيص
+# بالصور. التصنيف والتقسيم الدلالي يعيدان صيغة أخرى
+SUPPORTED_MODEL_TYPES = ('ObjectDetectionModel', 'InstanceSegmentationModel')
+
+
+def check_model_type(model):
+    """يرفع ValueError برسالة واضحة إذا لم يكن نوع مشروع Roboflow مدعوماً للتشخيص بالصور."""
+    model_type = type(model).__name__
+    if model_type not in SUPPORTED_MODEL_TYPES:
+        raise ValueError(
+            f"Roboflow model type '{model_type}' is not supported for image diagnosis. "
+            "ROBOFLOW_MODEL_ENDPOINT must be an object detection or instance segmentation project version."
+        )
+
+
+def hosted_url(model, default_url="https://detect.roboflow.com/"):
+    """
+    رابط Hosted API لإصدار النموذج، كما يختاره SDK حسب نوع المشروع: InstanceSegmentationModel
+    يحمل رابطه في api_url، و ObjectDetectionModel عنوانه الأساسي في base_url. default_url
+    (ROBOFLOW_API_URL) فقط إذا لم يحمل المقبض أياً منهما.
+    """
+    check_model_type(model)
+    api_url = getattr(model, 'api_url', None)
+    if api_url:
+        # رابط SDK قد يحمل معاملات الطلب (ومنها api_key): نمررها نحن
+        return api_url.split('?', 1)[0]
+    base_url = getattr(model, 'base_url', None) or default_url
+    # model.id = 'workspace/project/version' و model.version = رقم الإصدار (كما يبني SDK رابطه)
+    return f"{base_url.rstrip('/')}/{model.id.split('/')[1]}/{model.version}"
+
+
+# حجم القطعة عند القراءة من ملف مؤقت: مضاعف لـ 3 حتى يبقى ترميز base64 لكل قطعة صالحاً عند وصلها
+_B64_CHUNK_SIZE = 3 * 256 * 1024
+
+
+def _b64_chunks(file_obj):
+    """ترميز base64 تدفقي لملف كبير دون تحميله كاملاً في الذاكرة."""
+    file_obj.seek(0)
+    while True:
+        chunk = file_obj.read(_B64_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield base64.b64encode(chunk)
+
+
+def infer(model, api_key, image, api_url="https://detect.roboflow.com/", confidence=40, overlap=30, timeout=30):
+    """
+    استدلال واحد على Roboflow Hosted API مباشرة من الذاكرة، دون ملفات مؤقتة.
+
+    المدخلات:
+        model: مقبض النموذج من get_model (يحدد المشروع والإصدار ونقطة النهاية حسب نوعه).
+        image: bytes (صورة مرمّزة في الذاكرة) أو كائن ملف (مثلاً ملف رُفع وتم تخزينه
+               على القرص لكبر حجمه)، ويُرسل عندها كتدفق دون قراءته كاملاً.
+        api_url: العنوان الاحتياطي إذا لم يحدد المقبض نقطة نهايته (انظر hosted_url).
+
+    المخرجات:
+        dict: استجابة JSON من Roboflow (predictions, image, inference_id ...).
+    """
+    url = hosted_url(model, api_url)
+
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        body = base64.b64encode(image)
+    else:
+        body = _b64_chunks(image)
+
+    response = requests.post(
+        url,
+        params={
+            "api_key": api_key,
+            "confidence": confidence,
+            "overlap": overlap,
+            "format": "json",
+        },
+        data=body,
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return response.json()
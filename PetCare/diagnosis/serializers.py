@@ -0,0 +1,18 @@
+from rest_framework import serializers
+from .models import DiagnosisJob, DiagnosisRecord
+
+
+class DiagnosisJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.UUIDField(source='id', read_only=True)
+
+    class Meta:
+        model = DiagnosisJob
+        fields = ['job_id', 'status', 'result', 'error', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class DiagnosisRecordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DiagnosisRecord
+        fields = ['id', 'kind', 'model_version', 'symptoms', 'disease', 'confidence', 'result', 'cached', 'created_at']
+        read_only_fields = fields
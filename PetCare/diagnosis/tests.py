@@ -1,3 +1,244 @@
-from django.test import TestCase
+import io
+import math
+import random
+import threading
+from datetime import date
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from account.models import User
+from pets.models import Pet
+
+from . import benchmark, image_diagnosis, ml_model, roboflow_client
+from .encoder import SymptomEncoder
+from .history import RecordBuffer
+from .image_cache import ImageResultCache, dhash
+from .image_preprocessing import PreparedImage
+from .models import DiagnosisRecord
+
+
+class SymptomEncodingTests(SimpleTestCase):
+    """SymptomEncoder يجب أن يطابق مسار pandas الأصلي: DataFrame(...).fillna(0).clip(0, 1)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.bundle = benchmark.load_bundle(ml_model.registry._read_current(), "numpy")
+        cls.features = cls.bundle.features
+        rng = np.random.default_rng(0)
+        cls.inputs = (
+            benchmark.random_inputs(cls.features, 300, rng)
+            + benchmark.realistic_inputs(cls.bundle, 300, rng)
+            + [
+                {},
+                {"Not a symptom": 1},
+                {cls.features[0]: 0.5, cls.features[1]: 3, cls.features[2]: -1},
+                {cls.features[0]: None, cls.features[1]: float('nan'), cls.features[2]: "1"},
+                {name: 1 for name in cls.features},
+            ]
+        )
+
+    def dataframe_path(self, symptoms_list):
+        frame = pd.DataFrame(symptoms_list, columns=self.features)
+        return frame.apply(pd.to_numeric).fillna(0).clip(0, 1).to_numpy(dtype=np.float64)
+
+    def test_encode_matches_dataframe(self):
+        encoder = SymptomEncoder(self.features)
+        for symptoms in self.inputs:
+            np.testing.assert_array_equal(encoder.encode(symptoms), self.dataframe_path([symptoms]), err_msg=str(symptoms))
+
+    def test_encode_batch_matches_dataframe(self):
+        encoder = SymptomEncoder(self.features)
+        np.testing.assert_array_equal(encoder.encode_batch(self.inputs), self.dataframe_path(self.inputs))
+
+    def test_non_numeric_value_raises(self):
+        with self.assertRaises(ValueError):
+            SymptomEncoder(self.features).encode({self.features[0]: "yes"})
+
+
+class PredictionRegressionTests(SimpleTestCase):
+    """التنبؤات يجب أن تبقى متطابقة مهما تغيّر مسار الترميز أو الاستدلال أو الذاكرة."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        version = ml_model.registry._read_current()
+        cls.numpy_bundle = benchmark.load_bundle(version, "numpy")
+        cls.sklearn_bundle = benchmark.load_bundle(version, "sklearn")
+        rng = np.random.default_rng(1)
+        cls.inputs = (
+            benchmark.random_inputs(cls.numpy_bundle.features, 500, rng)
+            + benchmark.realistic_inputs(cls.numpy_bundle, 500, rng)
+            + [{}]
+        )
+
+    def assert_same_predictions(self, expected, actual):
+        self.assertEqual(len(expected), len(actual))
+        for (disease_a, conf_a), (disease_b, conf_b) in zip(expected, actual):
+            self.assertEqual(disease_a, disease_b)
+            self.assertTrue(math.isclose(conf_a, conf_b, rel_tol=0, abs_tol=1e-9), (conf_a, conf_b))
+
+    def test_predict_matches_predict_batch(self):
+        bundle = self.numpy_bundle
+        single = [ml_model.predict(symptoms, bundle=bundle) for symptoms in self.inputs]
+        self.assert_same_predictions(single, ml_model.predict_batch(self.inputs, bundle=bundle))
+
+    def test_top_k_first_entry_matches_predict(self):
+        bundle = self.numpy_bundle
+        ranked = ml_model.predict_top_k(self.inputs, 3, bundle=bundle)
+        self.assert_same_predictions(ml_model.predict_batch(self.inputs, bundle=bundle), [r[0] for r in ranked])
+        for row in ranked:
+            probabilities = [p for _, p in row]
+            self.assertEqual(probabilities, sorted(probabilities, reverse=True))
+
+    def test_numpy_backend_matches_sklearn(self):
+        X = self.numpy_bundle.symptom_encoder.encode_batch(self.inputs)
+        np.testing.assert_allclose(
+            self.numpy_bundle.model.predict_proba(X), self.sklearn_bundle.model.predict_proba(X), rtol=0, atol=1e-9
+        )
+        self.assert_same_predictions(
+            ml_model.predict_batch(self.inputs, bundle=self.sklearn_bundle),
+            ml_model.predict_batch(self.inputs, bundle=self.numpy_bundle)
+        )
+
+    def test_dataframe_encoding_matches_encoder(self):
+        # المسار الأصلي لـ predict قبل SymptomEncoder: DataFrame مباشرة إلى نموذج sklearn
+        model = self.sklearn_bundle.model
+        features = self.sklearn_bundle.features
+        frame = pd.DataFrame(self.inputs, columns=features).fillna(0).clip(0, 1)
+        probs = model.predict_proba(frame)
+        expected = [
+            (self.sklearn_bundle.labels[i], float(row[i]))
+            for row, i in zip(probs, probs.argmax(axis=1))
+        ]
+        self.assert_same_predictions(expected, ml_model.predict_batch(self.inputs, bundle=self.numpy_bundle))
+
+    def test_cached_results_match_uncached(self):
+        version = self.numpy_bundle.version
+        cached_bundle = benchmark.load_bundle(version, "numpy", cache_size=4096)
+        uncached = ml_model.predict_batch(self.inputs, bundle=self.numpy_bundle)
+        first = ml_model.predict_batch(self.inputs, bundle=cached_bundle)
+        second = ml_model.predict_batch(self.inputs, bundle=cached_bundle)
+        self.assertGreater(cached_bundle.cache.info()["hits"], 0)
+        self.assert_same_predictions(uncached, first)
+        self.assert_same_predictions(uncached, second)
+
+
+class RecordBufferTests(TransactionTestCase):
+    """سجل يفشل بـ IntegrityError يُسقط وحده ولا يعيق كتابة بقية الدفعة."""
+
+    def test_record_for_deleted_pet_is_dropped_alone(self):
+        user = User.objects.create_user(email='owner@example.com', password='x', first_name='A', last_name='B')
+        pets = [
+            Pet.objects.create(
+                owner=user, pet_name=name, pet_type='Cat', pet_color='Black', pet_gender='Male',
+                pet_birthday=date(2020, 1, 1), qr_token=name, qr_url=f'https://example.com/{name}'
+            )
+            for name in ('kept', 'deleted')
+        ]
+        buffer = RecordBuffer(batch_size=10)
+        buffer._thread = threading.current_thread()  # بلا خيط خلفي: الكتابة عبر flush() هنا
+        for pet in pets:
+            buffer.add(DiagnosisRecord(user_id=user.id, pet_id=pet.id, kind=DiagnosisRecord.KIND_SYMPTOMS, disease='x'))
+        pets[1].delete()
+
+        with self.assertLogs('diagnosis.history', 'ERROR'):
+            self.assertEqual(buffer.flush(), 1)
+
+        self.assertEqual(buffer.pending(), 0)
+        self.assertEqual(buffer.dropped, 1)
+        self.assertEqual(list(DiagnosisRecord.objects.values_list('pet_id', flat=True)), [pets[0].id])
+
+
+def _grid_jpeg(cells):
+    """JPEG بحجم 90x80 من شبكة 9x8 (كل خلية = بكسل واحد في dHash)."""
+    from PIL import Image
+
+    image = Image.new('L', (9, 8))
+    image.putdata(cells)
+    buffer = io.BytesIO()
+    image.resize((90, 80), Image.Resampling.NEAREST).convert('RGB').save(buffer, 'JPEG', quality=95)
+    return buffer.getvalue()
+
+
+@override_settings(DIAGNOSIS_IMAGE_CACHE_SIZE=16, DIAGNOSIS_LOCAL_DETECTOR_DELAY=0)
+class ImageResultCacheTests(SimpleTestCase):
+    """ذاكرة نتائج الصور مشتركة بين المستخدمين: صورة مختلفة لا تأخذ نتيجة غيرها."""
+
+    def setUp(self):
+        image_diagnosis._image_cache = None
+        self.addCleanup(setattr, image_diagnosis, '_image_cache', None)
+        rng = random.Random(1)
+        cells = [rng.randrange(256) for _ in range(72)]
+        other = list(cells)
+        other[0], other[40] = 255 - other[0], 255 - other[40]
+        self.first, self.second = _grid_jpeg(cells), _grid_jpeg(other)
+
+    def run_inference(self, data):
+        return image_diagnosis.run_inference(
+            image_diagnosis.LocalDetector(), data, PreparedImage(data, (90, 80), (90, 80))
+        )
+
+    def test_distinct_images_within_old_threshold_do_not_collide(self):
+        distance = (dhash(self.first) ^ dhash(self.second)).bit_count()
+        self.assertTrue(0 < distance <= 4, distance)
+
+        first = self.run_inference(self.first)
+        second = self.run_inference(self.second)
+
+        self.assertFalse(second["cached"])
+        self.assertNotEqual(second["raw_response_id"], first["raw_response_id"])
+
+    def test_cache_hit_does_not_return_foreign_inference_id(self):
+        first = self.run_inference(self.first)
+        again = self.run_inference(self.first)
+
+        self.assertTrue(again["cached"])
+        self.assertEqual(again["predictions"], first["predictions"])
+        self.assertIsNone(again["raw_response_id"])
+
+    def test_near_match_only_when_threshold_is_set(self):
+        cache = ImageResultCache()
+        cache.put('ns', 0b1011, 'result')
+        self.assertIsNone(cache.get('ns', 0b1010))
+        near = ImageResultCache(threshold=1)
+        near.put('ns', 0b1011, 'result')
+        self.assertEqual(near.get('ns', 0b1010), 'result')
+
+
+@skipUnless(roboflow_client.sdk_available(), "roboflow SDK is not installed")
+@override_settings(ROBOFLOW_API_KEY='key', ROBOFLOW_MODEL_ENDPOINT='workspace/project/3')
+class RoboflowEndpointTests(SimpleTestCase):
+    """نقطة نهاية الاستدلال تُختار من نوع مقبض النموذج، والأنواع بصيغة نتائج أخرى تُرفض."""
+
+    def model(self, model_class):
+        return model_class('key', 'workspace/project/3')
+
+    def test_endpoint_follows_model_type(self):
+        from roboflow.models.instance_segmentation import InstanceSegmentationModel
+        from roboflow.models.object_detection import ObjectDetectionModel
+
+        for model_class in (ObjectDetectionModel, InstanceSegmentationModel):
+            model = self.model(model_class)
+            with mock.patch.object(roboflow_client.requests, 'post') as post:
+                post.return_value.json.return_value = {"predictions": []}
+                roboflow_client.infer(model, 'key', b'image')
+            url = post.call_args.args[0]
+            self.assertTrue(url.endswith('/project/3'), url)
+            self.assertNotIn('?', url)
+
+    def test_unsupported_model_type_is_a_clear_error(self):
+        from roboflow.models.classification import ClassificationModel
+
+        detector = image_diagnosis.RoboflowDetector()
+        with mock.patch.object(roboflow_client, 'get_model', return_value=self.model(ClassificationModel)), \
+                mock.patch.object(roboflow_client.requests, 'post') as post:
+            with self.assertRaises(image_diagnosis.DiagnosisError) as raised, self.assertLogs('diagnosis', 'ERROR'):
+                image_diagnosis.run_inference(detector, b'image')
+
+        post.assert_not_called()
+        self.assertEqual(raised.exception.status_code, 500)
+        self.assertIn("ClassificationModel", raised.exception.detail)
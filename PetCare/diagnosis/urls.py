@@ -1,13 +1,40 @@
 
 from django.urls import path
-from .views import diagnose_by_symptoms, CatDiagnosisView
+from .views import (
+    diagnose_by_symptoms,
+    diagnosis_cache_stats,
+    diagnosis_model_versions,
+    image_diagnosis_cache_stats,
+    CatDiagnosisView,
+    CatDiagnosisJobCreateView,
+    CatDiagnosisJobDetailView,
+    PetDiagnosisHistoryView,
+)
 
 urlpatterns = [
     # المسار 1: التشخيص المعتمد على الأعراض (النموذج المحلي)
     # يمكن الوصول إليه عبر: [Your Domain]/api/symptoms/
     path('symptoms/', diagnose_by_symptoms, name='diagnosis_by_symptoms'),
+
+    # عدّادات ذاكرة نتائج التشخيص (للمشرفين): [Your Domain]/api/diagnose/symptoms/cache/
+    path('symptoms/cache/', diagnosis_cache_stats, name='diagnosis_cache_stats'),
+
+    # إصدارات نموذج التشخيص وتفعيلها (للمشرفين): [Your Domain]/api/diagnose/symptoms/model/
+    path('symptoms/model/', diagnosis_model_versions, name='diagnosis_model_versions'),
     
     # المسار 2: التشخيص المعتمد على الصور (Roboflow)
     # يمكن الوصول إليه عبر: [Your Domain]/api/cat/
     path('cat/', CatDiagnosisView.as_view(), name='cat-diagnosis'),
+
+    # عدّادات ذاكرة نتائج التشخيص بالصور (للمشرفين): [Your Domain]/api/diagnose/cat/cache/
+    path('cat/cache/', image_diagnosis_cache_stats, name='image_diagnosis_cache_stats'),
+
+    # المسار 3: التشخيص بالصور كمهمة غير متزامنة
+    # POST يعيد job_id فوراً: [Your Domain]/api/diagnose/cat/jobs/
+    path('cat/jobs/', CatDiagnosisJobCreateView.as_view(), name='cat-diagnosis-job-create'),
+    # GET حالة المهمة ونتيجتها: [Your Domain]/api/diagnose/cat/jobs/<job_id>/
+    path('cat/jobs/<uuid:pk>/', CatDiagnosisJobDetailView.as_view(), name='cat-diagnosis-job-detail'),
+
+    # المسار 4: سجل تشخيصات حيوان (مقسّم إلى صفحات): [Your Domain]/api/diagnose/history/pets/<pet_id>/
+    path('history/pets/<int:pet_id>/', PetDiagnosisHistoryView.as_view(), name='pet-diagnosis-history'),
 ]
\ No newline at end of file
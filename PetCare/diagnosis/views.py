@@ -1,41 +1,100 @@
 import logging
-import os
-import tempfile
 from django.conf import settings
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import transaction
 
-from rest_framework.decorators import api_view
+from rest_framework import generics
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.generics import get_object_or_404
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework import status
 from rest_framework.views import APIView
 
-from .ml_model import predict # لاستخدام دالة التشخيص القائمة على الأعراض
+# ملاحظة: diagnosis.ml_model (NumPy، ومعه joblib و sklearn عند تحميل النموذج) يُستورد داخل
+# دوال التشخيص بالأعراض عند أول استخدام، لا عند تحميل URLconf في كل عملية
 
-# استيراد مكتبة Roboflow
-try:
-    from roboflow import Roboflow
-except ImportError:
-    # هذا يسمح للبرنامج بالعمل حتى لو لم يتم تثبيت roboflow، ولكنه يفشل نقطة النهاية الخاصة بالصور
-    Roboflow = None 
+from pets.models import Pet
+
+from . import history
+from .image_diagnosis import DiagnosisError, get_detector, get_image_cache, prepare_upload, run_inference
+from .jobs import submit_job
+from .models import DiagnosisJob, DiagnosisRecord
+from .serializers import DiagnosisJobSerializer, DiagnosisRecordSerializer
 
 logger = logging.getLogger(__name__)
 
+
+def _get_pet_id(request, pet_id):
+    """
+    يتحقق من pet_id الاختياري (يجب أن يكون الحيوان ملكاً للمستخدم) ويعيده، أو None إذا لم يُرسل.
+    يرفع DiagnosisError إذا كان غير صالح.
+    """
+    if pet_id in (None, ''):
+        return None
+    try:
+        pet_id = int(pet_id)
+    except (TypeError, ValueError):
+        raise DiagnosisError("'pet_id' must be an integer.", status.HTTP_400_BAD_REQUEST)
+    if not Pet.objects.filter(pk=pet_id, owner=request.user).exists():
+        raise DiagnosisError("Pet not found.", status.HTTP_404_NOT_FOUND)
+    return pet_id
+
 # --- 1. التشخيص المعتمد على الأعراض (النموذج المحلي) ---
 
 @api_view(['POST'])
 def diagnose_by_symptoms(request):
     """
     نقطة نهاية API للتشخيص المعتمد على الأعراض (JSON POST).
+    تقبل قاموس أعراض واحد، أو قائمة قواميس لتشخيص دفعة كاملة في استدعاء واحد.
+    ?top_k=N يضيف للنتيجة "differential": أعلى N أمراض احتمالاً مع احتمالاتها.
+    ?pet_id=N يربط التشخيص بحيوان المستخدم في سجل التشخيص.
     """
+    from . import ml_model # لاستخدام دالة التشخيص القائمة على الأعراض
+
     symptoms = request.data
 
+    top_k = request.query_params.get('top_k')
+    if top_k is not None:
+        try:
+            top_k = int(top_k)
+            if top_k < 1:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "'top_k' must be a positive integer."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    try:
+        pet_id = _get_pet_id(request, request.query_params.get('pet_id'))
+    except DiagnosisError as e:
+        return Response({"error": e.detail}, status=e.status_code)
+
+    # نسخة واحدة من النموذج للطلب كله، حتى لو تم تبديل الإصدار أثناءه
+    bundle = ml_model.get_bundle()
+
+    if isinstance(symptoms, list):
+        return _diagnose_batch(symptoms, bundle, top_k, user_id=request.user.id, pet_id=pet_id)
+
     if not isinstance(symptoms, dict):
          return Response(
-            {"error": "JSON body must be a dictionary of symptoms and their values (0 or 1)."},
+            {"error": "JSON body must be a dictionary of symptoms and their values (0 or 1), or a list of such dictionaries."},
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    disease, confidence = predict(symptoms)
+    if top_k is not None:
+        return _diagnose_batch([symptoms], bundle, top_k, single=True, user_id=request.user.id, pet_id=pet_id)
+
+    try:
+        disease, confidence = ml_model.predict(symptoms, bundle=bundle)
+    except (TypeError, ValueError):
+        return Response(
+            {"error": "Symptom values must be numeric (0 or 1)."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
     if disease == "خطأ في تحميل النموذج":
          return Response(
@@ -43,97 +102,253 @@ def diagnose_by_symptoms(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+    # الحفظ في سجل التشخيص عبر مخزن مؤقت (بدون INSERT في هذا الطلب)
+    history.record_symptoms(request.user.id, pet_id, bundle, symptoms, disease, confidence)
+
     return Response({
         "disease": disease,
-        "confidence": confidence
+        "confidence": confidence,
+        "model_version": bundle.version
     }, status=status.HTTP_200_OK)
 
 
-# --- 2. التشخيص المعتمد على الصور (Roboflow API) ---
+def _diagnose_batch(symptoms_list, bundle, top_k=None, single=False, user_id=None, pet_id=None):
+    """
+    وضع الدفعة: قائمة قواميس أعراض ← قائمة {disease, confidence} بنفس الترتيب.
+    مع top_k تحمل كل نتيجة أيضاً "differential"، وsingle=True يعيد نتيجة الحيوان الوحيد مباشرة.
+    كل نتيجة تُحفظ في سجل التشخيص (user_id و pet_id).
+    """
+    from . import ml_model
 
-class CatDiagnosisView(APIView):
+    max_batch_size = getattr(settings, 'DIAGNOSIS_MAX_BATCH_SIZE', 100)
+
+    if not symptoms_list or not all(isinstance(item, dict) for item in symptoms_list):
+        return Response(
+            {"error": "Batch body must be a non-empty list of symptom dictionaries."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if len(symptoms_list) > max_batch_size:
+        return Response(
+            {"error": f"Batch size exceeds the maximum of {max_batch_size} items."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        if top_k is None:
+            results = ml_model.predict_batch(symptoms_list, bundle=bundle)
+        else:
+            results = ml_model.predict_top_k(symptoms_list, top_k, bundle=bundle)
+    except (TypeError, ValueError):
+        return Response(
+            {"error": "Symptom values must be numeric (0 or 1)."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if results is None:
+        return Response(
+            {"error": "Internal server error: The machine learning model failed to load."},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    if top_k is None:
+        items = [
+            {"disease": disease, "confidence": confidence}
+            for disease, confidence in results
+        ]
+    else:
+        items = [
+            {
+                "disease": ranked[0][0],
+                "confidence": ranked[0][1],
+                "differential": [
+                    {"disease": disease, "probability": probability}
+                    for disease, probability in ranked
+                ]
+            }
+            for ranked in results
+        ]
+
+    for symptoms, item in zip(symptoms_list, items):
+        history.record_symptoms(
+            user_id, pet_id, bundle, symptoms,
+            item["disease"], item["confidence"], differential=item.get("differential")
+        )
+
+    if single:
+        return Response({**items[0], "model_version": bundle.version}, status=status.HTTP_200_OK)
+
+    return Response({
+        "model_version": bundle.version,
+        "count": len(items),
+        "results": items
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def diagnosis_cache_stats(request):
     """
-    نقطة نهاية API للتشخيص المعتمد على صور جلد القطط باستخدام Roboflow.
-    تتطلب طلب POST مع 'image_file' في request.FILES.
+    عدّادات ذاكرة نتائج التشخيص بالأعراض (للمشرفين فقط).
     """
-    def post(self, request, *args, **kwargs):
-        if Roboflow is None:
-            return Response(
-                {"detail": "Roboflow library is not installed on the server."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-            
-        # 1. التحقق من وجود الصورة
-        image_file: InMemoryUploadedFile = request.FILES.get('image_file')
-        if not image_file:
-            return Response(
-                {"detail": "Image file is missing..."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    from . import ml_model
+
+    return Response(ml_model.cache_info(), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def image_diagnosis_cache_stats(request):
+    """
+    عدّادات ذاكرة نتائج التشخيص بالصور في هذه العملية (للمشرفين فقط).
+    """
+    return Response(get_image_cache().info(), status=status.HTTP_200_OK)
 
-        # 2. إعداد مفاتيح Roboflow وفصل معرّفات المشروع والإصدار (يجب إضافتها في settings.py)
-        api_key = getattr(settings, 'ROBOFLOW_API_KEY', None)
-        model_endpoint = getattr(settings, 'ROBOFLOW_MODEL_ENDPOINT', None)
 
-        if not api_key or not model_endpoint:
-            logger.error("Roboflow settings are missing.")
+@api_view(['GET', 'POST'])
+@permission_classes([IsAdminUser])
+def diagnosis_model_versions(request):
+    """
+    سجل إصدارات نموذج التشخيص (للمشرفين فقط).
+    GET: الإصدار النشط والإصدارات المتاحة وآخر خطأ تحميل.
+    POST {"version": "v2"}: تفعيل إصدار دون إعادة تشغيل (تلتقطه بقية العمليات خلال ثوانٍ).
+    """
+    from .ml_model import get_bundle, registry
+
+    if request.method == 'POST':
+        version = request.data.get('version')
+        if not version:
+            return Response({"error": "'version' is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            registry.activate(version)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except RuntimeError as e:
             return Response(
-                {"detail": "Roboflow API Key or Model Endpoint is not configured."},
+                {"error": f"Failed to load model version: {e}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-            
+
+    bundle = get_bundle()
+    return Response({
+        "active_version": bundle.version if bundle else None,
+        "available_versions": registry.versions(),
+        "last_error": registry.last_error
+    }, status=status.HTTP_200_OK)
+
+
+# --- 2. التشخيص المعتمد على الصور (Roboflow API) ---
+
+def _get_image_file(request):
+    # التحقق من وجود الصورة
+    image_file: InMemoryUploadedFile = request.FILES.get('image_file')
+    if not image_file:
+        raise DiagnosisError("Image file is missing...", status.HTTP_400_BAD_REQUEST)
+    return image_file
+
+
+def _get_image_pet_id(request):
+    # pet_id كحقل في نفس النموذج (multipart) أو في رابط الطلب
+    return _get_pet_id(request, request.data.get('pet_id') or request.query_params.get('pet_id'))
+
+
+class CatDiagnosisView(APIView):
+    """
+    نقطة نهاية API للتشخيص المعتمد على صور جلد القطط باستخدام Roboflow.
+    تتطلب طلب POST مع 'image_file' في request.FILES، و'pet_id' اختياري لربط النتيجة بسجل الحيوان.
+    """
+    def post(self, request, *args, **kwargs):
         try:
-            # مثال: 'workspace_name/project_name/version_id'
-            project_path, version_id = model_endpoint.rsplit('/', 1)
-            workspace_name, project_slug = project_path.split('/', 1)
-        except ValueError:
-             return Response(
-                 {"detail": "ROBOFLOW_MODEL_ENDPOINT format is incorrect. Expected: workspace_name/project_name/version_id"},
-                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-             )
+            # 1. التحقق من وجود الصورة وإعدادات نموذج الكشف
+            image_file = _get_image_file(request)
+            pet_id = _get_image_pet_id(request)
+            detector = get_detector()
+
+            # 2. تجهيز الصورة (تصغير وإعادة ترميز) ثم 3. الاستدلال ومعالجة النتائج
+            image, prepared = prepare_upload(detector, image_file)
+            result = run_inference(detector, image, prepared)
+        except DiagnosisError as e:
+            return Response({"detail": e.detail}, status=e.status_code)
+
+        history.record_image(request.user.id, pet_id, result, model_version=detector.model_version)
+
+        if result["cached"]:
+            message = "Diagnosis completed successfully (from cache, same image diagnosed recently)."
+        else:
+            message = "Diagnosis completed successfully (via Roboflow Hosted API)."
+
+        return Response({
+            "message": message,
+            **result
+        }, status=status.HTTP_200_OK)
+
 
-        temp_file_path = None
+class CatDiagnosisJobCreateView(APIView):
+    """
+    POST: نفس مدخلات CatDiagnosisView، لكن يعيد معرّف مهمة فوراً (202) ويجري الاستدلال
+    البعيد في مجمّع خيوط خلفي، فلا يبقى عامل gunicorn محجوزاً طوال طلب Roboflow.
+    تُتابع النتيجة عبر GET على status_url.
+    """
+    def post(self, request, *args, **kwargs):
         try:
-            # 3. حفظ الملف المؤقت للاستخدام من قبل SDK
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp_file:
-                tmp_file.write(image_file.read())
-                temp_file_path = tmp_file.name
-
-            # 4. المصادقة والتحميل باستخدام SDK 
-            rf = Roboflow(api_key=api_key)
-            workspace = rf.workspace(workspace_name)
-            project = workspace.project(project_slug)
-            model = project.version(int(version_id)).model
-
-            # 5. إجراء الاستدلال (Inference)
-            roboflow_result = model.predict(temp_file_path, confidence=40).json()
-
-        except Exception as e:
-            logger.error(f"Roboflow SDK Inference Failed: {e}")
-            return Response(
-                {"detail": f"Roboflow SDK Inference Failed. Check project ID/Version, Workspace permissions, or API Key: {e}"},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            image_file = _get_image_file(request)
+            pet_id = _get_image_pet_id(request)
+            detector = get_detector()
+            # التجهيز سريع ومحلي، فيتم هنا لتُحفظ الصورة المصغّرة فقط مع المهمة
+            image, prepared = prepare_upload(detector, image_file)
+        except DiagnosisError as e:
+            return Response({"detail": e.detail}, status=e.status_code)
+
+        if not isinstance(image, bytes):
+            image = image.read()
+
+        with transaction.atomic():
+            job = DiagnosisJob.objects.create(
+                user=request.user,
+                pet_id=pet_id,
+                image_data=image,
+                original_width=prepared.original_size[0] if prepared else None,
+                original_height=prepared.original_size[1] if prepared else None,
+                image_width=prepared.size[0] if prepared else None,
+                image_height=prepared.size[1] if prepared else None
             )
-        finally:
-            # 6. حذف الملف المؤقت (مهم جداً)
-            if temp_file_path and os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
-
-        # 7. معالجة النتائج وإرجاعها
-        predictions = roboflow_result.get('predictions', [])
-        
-        diagnosis_results = [
-            {
-                "disease": p.get('class'),
-                # تحويل نسبة الثقة إلى نسبة مئوية (تقريب لأقرب رقمين عشريين)
-                "confidence": round(p.get('confidence', 0) * 100, 2), 
-                "location": f"X: {p.get('x')}, Y: {p.get('y')}" 
-            }
-            for p in predictions
-        ]
+            submit_job(job.id)
 
         return Response({
-            "message": "Diagnosis completed successfully (via Roboflow SDK).",
-            "predictions": diagnosis_results,
-            "raw_response_id": roboflow_result.get('image', {}).get('id')
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": reverse('cat-diagnosis-job-detail', kwargs={'pk': job.id}, request=request)
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class CatDiagnosisJobDetailView(generics.RetrieveAPIView):
+    """GET: حالة مهمة التشخيص ونتيجتها (لصاحب المهمة فقط)."""
+    serializer_class = DiagnosisJobSerializer
+
+    def get_queryset(self):
+        return DiagnosisJob.objects.filter(user=self.request.user).defer('image_data')
+
+
+# --- 3. سجل التشخيص ---
+
+class DiagnosisHistoryPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class PetDiagnosisHistoryView(generics.ListAPIView):
+    """
+    GET: سجل تشخيصات حيوان واحد (بالأعراض وبالصور)، الأحدث أولاً ومقسّم إلى صفحات.
+    متاح لصاحب الحيوان وللمشرفين. السجلات تُكتب على دفعات، فقد يتأخر ظهور
+    أحدث تشخيص حتى DIAGNOSIS_HISTORY_FLUSH_INTERVAL ثانية.
+    """
+    serializer_class = DiagnosisRecordSerializer
+    pagination_class = DiagnosisHistoryPagination
+
+    def get_queryset(self):
+        pets = Pet.objects.all()
+        if not self.request.user.is_staff:
+            pets = pets.filter(owner=self.request.user)
+        pet = get_object_or_404(pets, pk=self.kwargs['pet_id'])
+        return DiagnosisRecord.objects.filter(pet=pet).order_by('-created_at', '-id')
@@ -0,0 +1,33 @@
+import logging
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """
+    تحميل مسبق اختياري لمكونات التشخيص الثقيلة التي تُستورد عادةً عند أول استخدام:
+    نموذج التشخيص بالأعراض (NumPy/joblib/sklearn) و SDK الخاص بـ Roboflow.
+
+    يُستدعى من gunicorn.conf.py عندما يكون DIAGNOSIS_WARM_UP مفعلاً: في العملية الرئيسية
+    قبل fork مع preload_app (فتتشاركه العمليات)، وإلا في كل عملية بعد إقلاعها.
+    يعيد مدة كل مرحلة بالثواني.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    from . import ml_model
+    ml_model.warm_up()
+    timings['symptom_model'] = time.perf_counter() - start
+
+    if getattr(settings, 'DIAGNOSIS_IMAGE_BACKEND', 'roboflow') == 'roboflow':
+        from . import roboflow_client
+        if roboflow_client.sdk_available():
+            start = time.perf_counter()
+            roboflow_client.import_sdk()
+            timings['roboflow_sdk'] = time.perf_counter() - start
+
+    logger.info("Diagnosis warm-up finished: %s", ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+    return timings
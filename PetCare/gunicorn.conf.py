@@ -0,0 +1,38 @@
+"""
+Gunicorn configuration for PetCare (picked up automatically from the
+working directory by `gunicorn PetCare.wsgi:application`).
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# Load the Django app once in the master before forking, so workers share it
+# copy-on-write. Set GUNICORN_PRELOAD=False to load it separately in every worker.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+
+def _warm_up():
+    # Heavy diagnosis dependencies are imported lazily on first use; when
+    # DIAGNOSIS_WARM_UP is on, load them at boot instead of in the first request.
+    from django.conf import settings
+
+    if getattr(settings, 'DIAGNOSIS_WARM_UP', False):
+        from diagnosis.warmup import warm_up
+        warm_up()
+
+
+def when_ready(server):
+    if preload_app:
+        # Runs in the master before the first fork: warmed-up state is shared.
+        _warm_up()
+        # Move everything loaded so far into the permanent GC generation so the
+        # workers' garbage collector does not write to (and un-share) those pages.
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        _warm_up()
+    worker.log.info("Worker ready (pid: %s)", worker.pid)
@@ -7,7 +7,9 @@ from django.shortcuts import get_object_or_404
 import logging
 
 # 🌟 استيراد Pushy Notification 🌟
-from notifications.utils import send_pushy_notification 
+# notify يُرسل بعد تأكيد المعاملة في خيط خلفي (مع حفظ الرسالة في صندوق الصادر)،
+# فلا يبقى الطلب (ولا أقفال قاعدة البيانات) بانتظار Pushy
+from notifications.outbox import notify
 
 # استيرادات المكافآت والأنشطة
 from reward_app.utils import award_points 
@@ -79,7 +81,7 @@ class CreateInteractionRequestView(generics.CreateAPIView):
             "type": request_type
         }
         
-        send_pushy_notification(recipient_user.id, title, body, payload)
+        notify(recipient_user.id, title, body, payload)
         
         # ----------------------------------------------------
         
@@ -198,14 +200,14 @@ class RequestUpdateStatusView(APIView):
             logger.error(f"DIAGNOSTIC VIEW: Preparing to send ACCEPTED notification to User {sender_id}")
             # -----------------------------------------------------------------
             
-            # 4. إرسال إشعار القبول عبر Pushy
+            # 4. إرسال إشعار القبول عبر Pushy (بعد تأكيد المعاملة)
             payload = {
                 "action": "REQUEST_STATUS_UPDATE",
                 "request_id": request_obj.id,
                 "status": new_status,
                 "pet_name": pet.pet_name
             }
-            send_pushy_notification(sender_id, title, body, payload)
+            notify(sender_id, title, body, payload)
             
             return Response({
                 "detail": f"Request accepted. Pet {pet.id} operation complete. {action_message}",
@@ -229,7 +231,7 @@ class RequestUpdateStatusView(APIView):
             # -----------------------------------------------------------------
             
             # 🚨 التعديل: إرسال الإشعار أولاً
-            send_pushy_notification(sender_id, title, body, payload)
+            notify(sender_id, title, body, payload)
             
             # 🚨 ثم حذف الطلب
             request_id = request_obj.id
@@ -1,3 +1,27 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Notification, PushOutbox, PushToken
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'title', 'is_read', 'created_at')
+    list_filter = ('is_read',)
+    search_fields = ('title',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(PushToken)
+class PushTokenAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'platform', 'failure_count', 'last_failure_at', 'updated_at')
+    list_filter = ('platform',)
+    search_fields = ('token',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(PushOutbox)
+class PushOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'title', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('title',)
+    raw_id_fields = ('user',)
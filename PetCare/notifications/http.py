@@ -0,0 +1,43 @@
+import threading
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+# جلسة HTTP مشتركة لكل العملية، تُنشأ عند أول استخدام (أي بعد fork في عمليات gunicorn)
+_session = None
+_session_lock = threading.Lock()
+
+
+def build_session(pool_size=None):
+    """
+    جلسة requests باتصالات دائمة (keep-alive): مجمّع بحجم PUSHY_POOL_SIZE اتصالاً لكل
+    مضيف، فيُعاد استخدام اتصال TCP/TLS المفتوح مع Pushy بدل مصافحة جديدة لكل إشعار.
+    يمكن استخدامها من عدة خيوط (خيوط outbox) في الوقت نفسه.
+    """
+    pool_size = pool_size or getattr(settings, 'PUSHY_POOL_SIZE', 10)
+    session = requests.Session()
+    # pool_block=False: إذا انشغلت كل الاتصالات يُفتح اتصال إضافي مؤقت بدل الانتظار.
+    # max_retries=0: إعادة المحاولة مسؤولية صندوق الصادر (PushOutbox) لا الجلسة
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def get_timeout():
+    """مهلة (الاتصال، القراءة) بالثواني لطلبات Pushy."""
+    return (
+        getattr(settings, 'PUSHY_CONNECT_TIMEOUT', 5),
+        getattr(settings, 'PUSHY_READ_TIMEOUT', 10),
+    )
@@ -0,0 +1,79 @@
+import base64
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from .models import Notification, NotificationCounter
+
+
+def add_to_inbox(user_ids, title, body, data=None):
+    """
+    يكتب الإشعار في صندوق وارد كل مستخدم: INSERT واحد لكل الصفوف، ثم زيادة عدّاد غير
+    المقروء لهم جميعاً بتحديث واحد بـ F(). يُستدعى داخل معاملة الطلب (عبر notify) فيُلغى معها.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return []
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create([
+            Notification(user_id=user_id, title=title, body=body, data=data or {})
+            for user_id in user_ids
+        ])
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id) for user_id in user_ids], ignore_conflicts=True
+        )
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F('unread') + 1)
+    return notifications
+
+
+def unread_count(user):
+    return NotificationCounter.objects.filter(user=user).values_list('unread', flat=True).first() or 0
+
+
+def mark_read(user, ids=None):
+    """يعلّم إشعارات المستخدم (المحددة في ids، أو كلها) كمقروءة ويعيد عددها."""
+    with transaction.atomic():
+        unread = Notification.objects.filter(user=user, is_read=False)
+        if ids is not None:
+            unread = unread.filter(id__in=ids)
+        updated = unread.update(is_read=True)
+        if updated:
+            NotificationCounter.objects.filter(user=user).update(unread=Greatest(F('unread') - updated, 0))
+    return updated
+
+
+def encode_cursor(notification):
+    raw = f"{notification.created_at.isoformat()}|{notification.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """يعيد (created_at, id) من مؤشر encode_cursor، ويرفع ValueError إذا كان تالفاً."""
+    try:
+        created_at, notification_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(notification_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor.") from e
+
+
+def inbox_page(user, cursor=None, limit=20):
+    """
+    صفحة من صندوق الوارد، الأحدث أولاً، بترقيم keyset على (created_at, id): كل صفحة
+    مدى واحد على الفهرس notification_inbox_idx بعد آخر عنصر في الصفحة السابقة، فلا
+    تزيد الكلفة مع عمق الصفحة أو حجم السجل. يعيد (الإشعارات، مؤشر الصفحة التالية أو None).
+    """
+    queryset = Notification.objects.filter(user=user)
+    if cursor:
+        created_at, notification_id = decode_cursor(cursor)
+        # created_at__lte يبدأ البحث في الفهرس عند المؤشر مباشرة، والشرط الثاني يحسم التعادل
+        queryset = queryset.filter(
+            Q(created_at__lte=created_at),
+            Q(created_at__lt=created_at) | Q(id__lt=notification_id)
+        )
+    page = list(queryset.order_by('-created_at', '-id')[:limit + 1])
+    if len(page) > limit:
+        page = page[:limit]
+        return page, encode_cursor(page[-1])
+    return page, None
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+import requests
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from notifications import http, utils
+from notifications.stub_server import PushyStubServer, make_self_signed_cert
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark Pushy sends against a local stub server: a new connection per push "
+        "(module-level requests.post) versus the pooled keep-alive session. Reports per-push "
+        "latency and how many connections the server accepted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pushes', type=int, default=300)
+        parser.add_argument('--tokens', type=int, default=3, help="Device tokens per push.")
+        parser.add_argument('--no-tls', action='store_true', help="Plain HTTP (measures only the TCP handshake).")
+        parser.add_argument('--latency', type=float, default=0.0, help="Extra server-side milliseconds per request.")
+
+    def handle(self, *args, **options):
+        certfile = keyfile = None
+        if not options['no_tls']:
+            certfile, keyfile = make_self_signed_cert(tempfile.mkdtemp())
+
+        server = PushyStubServer(('127.0.0.1', 0), certfile=certfile, keyfile=keyfile, latency=options['latency'] / 1000)
+        server.start()
+        tokens = [f"stub-token-{i}" for i in range(options['tokens'])]
+        env = {'REQUESTS_CA_BUNDLE': certfile} if certfile else {}
+
+        self.stdout.write(f"Stub server: {server.url}, {options['pushes']} pushes of {len(tokens)} tokens")
+        self.stdout.write(f"{'mode':<16} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'connections':>12}")
+        try:
+            with override_settings(PUSHY_API_URL=server.url, PUSHY_SECRET_KEY='stub'), mock.patch.dict(os.environ, env), \
+                    mock.patch.object(utils, 'record_delivery', lambda tokens, failed: 0):
+                # record_delivery معطّل: القياس لطلب HTTP فقط، بدون تحديث الرموز في قاعدة البيانات
+                # requests.post: جلسة واتصال جديدان لكل إشعار (السلوك السابق)
+                with mock.patch.object(utils, 'get_session', lambda: requests):
+                    self._run("new connection", server, tokens, options['pushes'])
+                http._session = None
+                self._run("pooled session", server, tokens, options['pushes'])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _run(self, mode, server, tokens, pushes):
+        # إحماء (وفتح اتصال الجلسة المشتركة) خارج القياس
+        utils._post_push('stub', tokens, "bench", "bench", {}, "bench")
+        server.reset_counters()
+
+        samples = []
+        for _ in range(pushes):
+            start = time.perf_counter()
+            result = utils._post_push('stub', tokens, "bench", "bench", {}, "bench")
+            samples.append(time.perf_counter() - start)
+            if result != utils.PUSH_SENT:
+                self.stderr.write(f"{mode}: push returned {result}")
+
+        samples = np.asarray(samples) * 1000
+        self.stdout.write(
+            f"{mode:<16} {np.percentile(samples, 50):>8.2f} {np.percentile(samples, 95):>8.2f} "
+            f"{samples.mean():>8.2f} {server.connections:>12}"
+        )
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import dispatch_pending, requeue_stale
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver due push notifications from the outbox (retries and anything left over after a restart). "
+        "Use --loop to run as a long-lived dispatcher process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling the outbox instead of exiting.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between polls with --loop.")
+        parser.add_argument('--limit', type=int, default=100, help="Maximum messages per poll.")
+        parser.add_argument(
+            '--stale-minutes', type=int, default=10,
+            help="Re-queue messages stuck in Sending for longer than this (process died mid-send)."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale(options['stale_minutes'])
+            if requeued:
+                self.stdout.write(f"Re-queued {requeued} stale message(s).")
+
+            processed = dispatch_pending(limit=options['limit'])
+            if processed or not options['loop']:
+                self.stdout.write(f"Processed {processed} message(s).")
+
+            if not options['loop']:
+                break
+            # دفعة ممتلئة تعني غالباً وجود المزيد: لا ننتظر
+            if processed < options['limit']:
+                time.sleep(options['interval'])
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.tokens import prune_stale
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete push tokens that have not been re-registered by the app for --days days. "
+        "Run it periodically (e.g. daily from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help="Maximum token age since last registration (default: PUSH_TOKEN_MAX_AGE_DAYS)."
+        )
+
+    def handle(self, *args, **options):
+        days = options['days'] or getattr(settings, 'PUSH_TOKEN_MAX_AGE_DAYS', 180)
+        deleted = prune_stale(days)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} push token(s) not updated in {days} days."))
@@ -0,0 +1,40 @@
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from notifications.stub_server import PushyStubServer, make_self_signed_cert
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the Pushy /push API. Point PUSHY_API_URL at the printed URL "
+        "to send notifications without reaching api.pushy.me."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--tls', action='store_true', help="Serve HTTPS (uses --certfile/--keyfile or a generated self-signed cert).")
+        parser.add_argument('--certfile')
+        parser.add_argument('--keyfile')
+        parser.add_argument('--latency', type=float, default=0.0, help="Extra milliseconds per request.")
+
+    def handle(self, *args, **options):
+        certfile, keyfile = options['certfile'], options['keyfile']
+        if options['tls'] and not certfile:
+            certfile, keyfile = make_self_signed_cert(tempfile.mkdtemp(), options['host'])
+            self.stdout.write(f"Self-signed certificate: {certfile} (set REQUESTS_CA_BUNDLE to it)")
+
+        server = PushyStubServer(
+            (options['host'], options['port']),
+            certfile=certfile, keyfile=keyfile,
+            latency=options['latency'] / 1000, verbose=True
+        )
+        self.stdout.write(self.style.SUCCESS(f"Pushy stub listening on {server.url}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"{server.requests} request(s) over {server.connections} connection(s).")
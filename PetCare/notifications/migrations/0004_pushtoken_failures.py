@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_pushoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pushtoken',
+            name='failure_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pushtoken',
+            name='last_failure_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from account.models import User # Assuming User model path
 
 class PushToken(models.Model):
@@ -22,6 +23,10 @@ class PushToken(models.Model):
         null=True, 
         verbose_name='Platform'
     ) # Example: 'android', 'ios'
+    # Sends Pushy reported as failed for this token since it was last registered;
+    # the token is deleted at PUSH_TOKEN_MAX_FAILURES.
+    failure_count = models.PositiveIntegerField(default=0)
+    last_failure_at = models.DateTimeField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -34,4 +39,103 @@ class PushToken(models.Model):
         
     def __str__(self):
         # Assuming User model has full_name and email fields
-        return f"{self.user.full_name or self.user.email} - {self.platform}"
\ No newline at end of file
+        return f"{self.user.full_name or self.user.email} - {self.platform}"
+
+class PushOutbox(models.Model):
+    """
+    Push notifications waiting to be delivered through Pushy.
+
+    Rows are written inside the same database transaction as the change that
+    triggers the notification, so a rolled-back request never sends a push and
+    a committed one is never lost. A background dispatcher (see
+    notifications/outbox.py) delivers them after commit and retries failures.
+    """
+    STATUS_PENDING = 'Pending'
+    STATUS_SENDING = 'Sending'
+    STATUS_SENT = 'Sent'
+    STATUS_SKIPPED = 'Skipped'
+    STATUS_FAILED = 'Failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_SKIPPED, 'Skipped'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='push_outbox',
+        verbose_name='Recipient'
+    )
+    title = models.CharField(max_length=255)
+    body = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # Earliest time of the next delivery attempt (pushed back after each failure)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+        verbose_name = 'Push Notification (Outbox)'
+        verbose_name_plural = 'Push Notifications (Outbox)'
+
+    def __str__(self):
+        return f"{self.title} -> {self.user_id} ({self.status})"
+
+
+class Notification(models.Model):
+    """
+    A user's persistent notification inbox.
+
+    One row per recipient is written in bulk next to every push sent through
+    notifications.outbox.notify(), so a user who missed a push on the device can
+    still sync it. Listed newest first with keyset pagination on (created_at, id).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Recipient'
+    )
+    title = models.CharField(max_length=255)
+    body = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} -> {self.user_id}"
+
+
+class NotificationCounter(models.Model):
+    """
+    Unread notification count per user, kept in step with Notification rows so
+    the unread badge is a primary-key lookup instead of a COUNT over the inbox.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter'
+    )
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
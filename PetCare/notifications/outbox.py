@@ -0,0 +1,213 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .inbox import add_to_inbox
+from .models import PushOutbox
+from .utils import PUSH_RETRY, PUSH_SENT, PUSH_SKIPPED, send_bulk_push
+
+logger = logging.getLogger(__name__)
+
+# مجمّع خيوط خلفي لكل عملية، يُنشأ عند أول استخدام (أي بعد fork في عمليات gunicorn)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'PUSH_OUTBOX_WORKERS', 2),
+                    thread_name_prefix='push-outbox'
+                )
+    return _executor
+
+
+def notify(user_ids, title, body, data=None, durable=True, inbox=True):
+    """
+    الواجهة الموصى بها لإرسال إشعار من داخل طلب: لا يُرسل شيء قبل تأكيد المعاملة
+    الحالية (ولا يُرسل أبداً إذا أُلغيت)، والإرسال نفسه يتم في مجمّع الخيوط الخلفي،
+    فلا تبقى أقفال قاعدة البيانات محجوزة أثناء الاتصال بـ Pushy.
+
+    المدخلات:
+        user_ids: معرّف مستخدم أو قائمة معرّفات.
+        durable (bool): True (الافتراضي) يكتب الرسائل في PushOutbox داخل المعاملة، فتُعاد
+            محاولتها عند الفشل وتنجو من إعادة تشغيل العملية. False لا يكتب في PushOutbox:
+            الإرسال مرة واحدة بعد التأكيد، للإشعارات غير المهمة.
+        inbox (bool): True (الافتراضي) يحفظ الإشعار أيضاً في صندوق وارد المستخدمين
+            (Notification) داخل المعاملة نفسها، ليراه من فاته الإشعار على جهازه.
+    """
+    user_ids = [user_ids] if isinstance(user_ids, int) else list(user_ids)
+    if inbox:
+        add_to_inbox(user_ids, title, body, data)
+    if durable:
+        return enqueue_bulk_push(user_ids, title, body, data)
+    transaction.on_commit(
+        lambda: _get_executor().submit(_send_in_thread, user_ids, title, body, data),
+        robust=True
+    )
+    return None
+
+
+def _send_in_thread(user_ids, title, body, data):
+    try:
+        send_bulk_push([(user_ids, title, body, data)])
+    except Exception:
+        logger.exception(f"Push notification to {len(user_ids)} user(s) failed.")
+    finally:
+        close_old_connections()
+
+
+def enqueue_push(user_id, title, body, data=None):
+    """
+    يضيف إشعاراً إلى صندوق الصادر (PushOutbox) داخل المعاملة الحالية، ثم يرسله
+    مجمّع الخيوط بعد تأكيد المعاملة. لا يتصل بـ Pushy أثناء الطلب، فلا يتأثر زمن
+    الطلب ولا مدة أقفال قاعدة البيانات ببطء Pushy، ولا يُرسل شيء إذا أُلغيت المعاملة.
+    """
+    message = PushOutbox.objects.create(user_id=user_id, title=title, body=body, data=data or {})
+    transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, [message.id]), robust=True)
+    return message
+
+
+def enqueue_bulk_push(user_ids, title, body, data=None):
+    """
+    مثل enqueue_push لإشعار واحد موجّه لعدة مستخدمين: INSERT واحد لكل الرسائل،
+    ثم تُرسل بعد تأكيد المعاملة عبر send_bulk_push (طلب /push لكل دفعة رموز).
+    """
+    messages = PushOutbox.objects.bulk_create([
+        PushOutbox(user_id=user_id, title=title, body=body, data=data or {})
+        for user_id in dict.fromkeys(user_ids)
+    ])
+    ids = [message.id for message in messages]
+    if ids:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, ids), robust=True)
+    return messages
+
+
+def _run_in_thread(message_ids):
+    try:
+        # إشعار لأكثر من limit مستخدم يُرسل على عدة دفعات: نكمل حتى لا يبقى منه شيء مستحق
+        # (المؤجَّل لإعادة المحاولة ليس مستحقاً الآن، فتنتهي الحلقة)
+        while dispatch_pending(ids=message_ids, limit=getattr(settings, 'PUSHY_MAX_RECIPIENTS', 1000)):
+            pass
+        # ثم أي رسائل أخرى حان موعد إعادة محاولتها (إلى جانب أمر dispatch_push_outbox)
+        dispatch_pending()
+    finally:
+        # كل خيط يفتح اتصاله الخاص بقاعدة البيانات
+        close_old_connections()
+
+
+def _retry_delay(attempts):
+    # تأخير أسّي: base, 2*base, 4*base ... بحد أقصى ساعة
+    base = getattr(settings, 'PUSH_OUTBOX_RETRY_DELAY', 30)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 3600))
+
+
+def _claim(message_ids):
+    """
+    يحجز الرسائل المستحقة من message_ids (Pending → Sending) بـ UPDATE شرطي واحد حتى لا
+    تُرسل مرتين، ويعيدها. وقت الحجز (updated_at) يميّز ما حجزه هذا الاستدعاء عن حجز متزامن.
+    """
+    now = timezone.now()
+    PushOutbox.objects.filter(
+        id__in=message_ids,
+        status=PushOutbox.STATUS_PENDING,
+        next_attempt_at__lte=now
+    ).update(status=PushOutbox.STATUS_SENDING, updated_at=now)
+    return list(PushOutbox.objects.filter(id__in=message_ids, status=PushOutbox.STATUS_SENDING, updated_at=now))
+
+
+def _group_key(message):
+    return (message.title, message.body, json.dumps(message.data, sort_keys=True))
+
+
+def deliver_many(messages):
+    """
+    يرسل رسائل محجوزة ويحفظ نتائجها (مع جدولة إعادة المحاولة عند الفشل المؤقت).
+    الرسائل ذات المحتوى نفسه (عنوان ونص وبيانات) تُرسل معاً عبر send_bulk_push،
+    فإشعار موجّه لعدة مستخدمين يكلّف طلب /push لكل دفعة رموز لا لكل مستخدم.
+    يعيد قائمة النتائج بترتيب messages.
+    """
+    groups = {}
+    for message in messages:
+        groups.setdefault(_group_key(message), []).append(message)
+    groups = list(groups.values())
+
+    error = ''
+    try:
+        group_results = send_bulk_push(
+            [([m.user_id for m in group], group[0].title, group[0].body, group[0].data) for group in groups]
+        )
+    except Exception as e:
+        logger.exception(f"Push outbox batch of {len(messages)} messages failed unexpectedly.")
+        group_results = [{} for _ in groups]
+        error = str(e)
+
+    results = {}
+    for group, statuses in zip(groups, group_results):
+        for message in group:
+            results[message.id] = _apply_result(message, statuses.get(message.user_id, PUSH_RETRY), error)
+
+    PushOutbox.objects.bulk_update(
+        messages, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'updated_at']
+    )
+    return [results[message.id] for message in messages]
+
+
+def deliver(message):
+    """يرسل رسالة محجوزة واحدة ويحفظ نتيجتها."""
+    return deliver_many([message])[0]
+
+
+def _apply_result(message, result, error=''):
+    max_attempts = getattr(settings, 'PUSH_OUTBOX_MAX_ATTEMPTS', 5)
+
+    message.attempts += 1
+    now = timezone.now()
+    message.updated_at = now
+    if result == PUSH_SENT:
+        message.status = PushOutbox.STATUS_SENT
+        message.sent_at = now
+    elif result == PUSH_SKIPPED:
+        message.status = PushOutbox.STATUS_SKIPPED
+    elif result == PUSH_RETRY and message.attempts < max_attempts:
+        message.status = PushOutbox.STATUS_PENDING
+        message.next_attempt_at = now + _retry_delay(message.attempts)
+    else:
+        message.status = PushOutbox.STATUS_FAILED
+
+    if result != PUSH_SENT:
+        message.last_error = error or result
+    return result
+
+
+def dispatch_pending(ids=None, limit=100):
+    """
+    يرسل الرسائل المستحقة (كلها، أو المحددة في ids فقط)، حتى limit رسالة. يعيد عدد الرسائل
+    التي عولجت. آمن للتشغيل المتزامن من عدة عمليات: الدفعة تُحجز كلها قبل إرسالها.
+    """
+    due = PushOutbox.objects.filter(status=PushOutbox.STATUS_PENDING, next_attempt_at__lte=timezone.now())
+    if ids is not None:
+        due = due.filter(id__in=ids)
+
+    claimed = _claim(list(due.order_by('next_attempt_at').values_list('id', flat=True)[:limit]))
+    if not claimed:
+        return 0
+    deliver_many(claimed)
+    return len(claimed)
+
+
+def requeue_stale(minutes):
+    """يعيد رسائل بقيت Sending أكثر من minutes دقيقة (توقف العملية أثناء الإرسال) إلى Pending."""
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return PushOutbox.objects.filter(
+        status=PushOutbox.STATUS_SENDING, updated_at__lt=cutoff
+    ).update(status=PushOutbox.STATUS_PENDING, next_attempt_at=timezone.now(), updated_at=timezone.now())
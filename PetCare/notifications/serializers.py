@@ -1,20 +1,36 @@
 from rest_framework import serializers
-from .models import PushToken
+from .models import Notification, PushToken
+from .tokens import invalidate_tokens
 
 class PushTokenSerializer(serializers.ModelSerializer):
     class Meta:
         model = PushToken
-        fields = ['token', 'platform'] 
+        fields = ['token', 'platform']
+        extra_kwargs = {
+            # إعادة تسجيل رمز معروف هي الحالة المعتادة (كل تشغيل للتطبيق): بدون هذا يرفضها
+            # UniqueValidator بـ 400 قبل create، فلا يتحدث updated_at ولا يُصفَّر عداد الفشل
+            'token': {'validators': []},
+        }
         
     def create(self, validated_data):
         user = self.context['request'].user
         token = validated_data['token']
         platform = validated_data.get('platform')
+        previous_user_id = PushToken.objects.filter(token=token).values_list('user_id', flat=True).first()
         
-        # تحديث الـ Token إذا كان موجوداً، وإلا يتم إنشاء كائن جديد
+        # تحديث الـ Token إذا كان موجوداً، وإلا يتم إنشاء كائن جديد.
+        # البحث بالرمز وحده (فريد): جهاز سُجّل دخوله بحساب آخر ينتقل إلى المستخدم الحالي
         push_token, created = PushToken.objects.update_or_create(
-            user=user,
             token=token,
-            defaults={'platform': platform}
+            # إعادة التسجيل تعني أن التطبيق يعتبر الرمز صالحاً: نصفّر عداد الفشل
+            defaults={'user': user, 'platform': platform, 'failure_count': 0, 'last_failure_at': None}
         )
-        return push_token
\ No newline at end of file
+        # قوائم الرموز المخزنة مؤقتاً للمستخدم (وللمالك السابق للرمز) لم تعد صحيحة
+        invalidate_tokens([user.id] + ([previous_user_id] if previous_user_id else []))
+        return push_token
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ['id', 'title', 'body', 'data', 'is_read', 'created_at']
@@ -0,0 +1,116 @@
+import json
+import os
+import ssl
+import subprocess
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class PushyStubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 حتى يبقى الاتصال مفتوحاً بين الطلبات (keep-alive) كما في Pushy
+    protocol_version = 'HTTP/1.1'
+    # الترويسات والجسم يُكتبان منفصلين: بدون TCP_NODELAY تتأخر الردود على الاتصال الدائم ~40ms (Nagle)
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._reply(400, {"error": "Malformed JSON."})
+
+        if self.path.split('?')[0] != '/push':
+            return self._reply(404, {"error": "Not found."})
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        with self.server.lock:
+            self.server.requests += 1
+        to = payload.get('to') or []
+        tokens = [to] if isinstance(to, str) else to
+        if not tokens:
+            return self._reply(400, {"error": "Please provide at least one recipient."})
+        # الرموز التي تبدأ بـ "invalid" تُرد في info.failed كما يفعل Pushy مع الرموز المنتهية
+        failed = [token for token in tokens if token.startswith('invalid')]
+        info = {"devices": len(tokens) - len(failed)}
+        if failed:
+            info["failed"] = failed
+        return self._reply(200, {"success": True, "id": uuid.uuid4().hex[:24], "info": info})
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class PushyStubServer(ThreadingHTTPServer):
+    """
+    خادم محلي بديل لـ Pushy (مسار /push فقط) للتطوير والقياس: يقبل أي api_key،
+    ويرد بنجاح على كل طلب فيه مستلمون (ويعيد الرموز التي تبدأ بـ invalid في info.failed)، ويحصي الاتصالات المقبولة والطلبات لمعرفة
+    هل يُعاد استخدام الاتصالات. latency: تأخير اختياري (بالثواني) لكل طلب.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, certfile=None, keyfile=None, latency=0.0, verbose=False):
+        super().__init__(address, PushyStubHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.latency = latency
+        self.verbose = verbose
+        self.scheme = 'http'
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self.socket = context.wrap_socket(self.socket, server_side=True)
+            self.scheme = 'https'
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"{self.scheme}://{host}:{port}/push"
+
+    def reset_counters(self):
+        with self.lock:
+            self.connections = 0
+            self.requests = 0
+
+    def start(self):
+        """يشغّل الخادم في خيط خلفي ويعيده."""
+        thread = threading.Thread(target=self.serve_forever, name='pushy-stub', daemon=True)
+        thread.start()
+        return thread
+
+
+def make_self_signed_cert(directory, host='127.0.0.1'):
+    """
+    ينشئ شهادة TLS ذاتية التوقيع لـ host في directory عبر أداة openssl، ويعيد
+    (certfile, keyfile). تُمرَّر certfile للعميل كـ CA (REQUESTS_CA_BUNDLE) أثناء القياس.
+    """
+    certfile = os.path.join(directory, 'pushy-stub.crt')
+    keyfile = os.path.join(directory, 'pushy-stub.key')
+    san = f"IP:{host}" if host.replace('.', '').isdigit() else f"DNS:{host}"
+    subprocess.run(
+        [
+            'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+            '-subj', f'/CN={host}', '-addext', f'subjectAltName={san}',
+            '-keyout', keyfile, '-out', certfile,
+        ],
+        check=True, capture_output=True
+    )
+    return certfile, keyfile
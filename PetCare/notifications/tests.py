@@ -1,3 +1,207 @@
-from django.test import TestCase
+import base64
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from account.models import User
+
+from . import outbox, utils
+from .inbox import add_to_inbox, encode_cursor
+from .models import Notification, PushOutbox, PushToken
+from .tokens import get_tokens, prune_stale
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class RegisterPushTokenTests(TestCase):
+    """POST /api/notifications/register/ لرمز معروف يجب أن يحدّثه (upsert) لا أن يرفضه."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x', first_name='A', last_name='B')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def register(self, token='device-1', platform='android'):
+        return self.client.post('/api/notifications/register/', {'token': token, 'platform': platform}, format='json')
+
+    def test_reregistering_known_token_refreshes_updated_at(self):
+        self.assertEqual(self.register().status_code, 201)
+        old = timezone.now() - timedelta(days=200)
+        PushToken.objects.filter(token='device-1').update(updated_at=old)
+
+        response = self.register(platform='ios')
+
+        self.assertEqual(response.status_code, 201)
+        token = PushToken.objects.get(token='device-1')
+        self.assertEqual(token.platform, 'ios')
+        self.assertGreater(token.updated_at, old)
+        # لم يعد قديماً: لا يحذفه prune_push_tokens
+        self.assertEqual(prune_stale(180), 0)
+        self.assertEqual(PushToken.objects.count(), 1)
+
+    def test_reregistering_token_of_another_user_moves_it(self):
+        other = User.objects.create_user(email='other@example.com', password='x', first_name='C', last_name='D')
+        PushToken.objects.create(user=other, token='device-1')
+        self.assertEqual(get_tokens([other.id]), {other.id: ['device-1']})
+
+        self.assertEqual(self.register().status_code, 201)
+
+        self.assertEqual(PushToken.objects.get(token='device-1').user, self.user)
+        self.assertEqual(get_tokens([other.id, self.user.id]), {other.id: [], self.user.id: ['device-1']})
+
+    def test_reregistering_clears_failure_count(self):
+        PushToken.objects.create(user=self.user, token='device-1', failure_count=2, last_failure_at=timezone.now())
+
+        self.assertEqual(self.register().status_code, 201)
+
+        token = PushToken.objects.get(token='device-1')
+        self.assertEqual(token.failure_count, 0)
+        self.assertIsNone(token.last_failure_at)
+
+
+class DispatchPendingTests(TestCase):
+    """dispatch_pending يحجز الدفعة كلها بـ UPDATE واحد، فلا تتضاعف الاستعلامات بعدد الرسائل."""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f'user{i}@example.com', password='x', first_name='A', last_name='B')
+            for i in range(5)
+        ]
+
+    def enqueue(self, users):
+        return [
+            PushOutbox.objects.create(user=user, title='Title', body='Body')
+            for user in users
+        ]
+
+    def dispatch(self):
+        with mock.patch.object(outbox, 'send_bulk_push', side_effect=lambda messages: [
+            dict.fromkeys(user_ids, outbox.PUSH_SENT) for user_ids, *_ in messages
+        ]) as send, CaptureQueriesContext(connection) as queries:
+            processed = outbox.dispatch_pending()
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        return processed, send, updates
+
+    def test_claim_is_one_update_for_the_whole_batch(self):
+        self.enqueue(self.users)
+
+        processed, send, updates = self.dispatch()
+
+        self.assertEqual(processed, 5)
+        self.assertEqual(send.call_count, 1)
+        # حجز واحد + bulk_update واحد للنتائج
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(PushOutbox.objects.filter(status=PushOutbox.STATUS_SENT).count(), 5)
+
+    def test_claimed_messages_are_not_sent_again(self):
+        self.enqueue(self.users[:2])
+        self.dispatch()
+
+        processed, send, updates = self.dispatch()
+
+        self.assertEqual(processed, 0)
+        send.assert_not_called()
+
+    @override_settings(PUSHY_MAX_RECIPIENTS=2)
+    def test_fan_out_larger_than_one_batch_is_fully_dispatched(self):
+        ids = [message.id for message in self.enqueue(self.users)]
+
+        with mock.patch.object(outbox, 'send_bulk_push', side_effect=lambda messages: [
+            dict.fromkeys(user_ids, outbox.PUSH_SENT) for user_ids, *_ in messages
+        ]) as send, mock.patch.object(outbox, 'close_old_connections'):
+            outbox._run_in_thread(ids)
+
+        self.assertEqual(send.call_count, 3)
+        self.assertFalse(PushOutbox.objects.exclude(status=PushOutbox.STATUS_SENT).exists())
+
+
+@override_settings(PUSHY_SECRET_KEY='secret')
+class SendBulkPushTests(TestCase):
+    """رموز المستخدم الواحد لا تُقسم بين طلبات /push، وإن قُسمت فالفشل المؤقت يغلب."""
+
+    def send(self, tokens_by_user, results):
+        with mock.patch.object(utils, 'get_tokens', return_value=tokens_by_user), \
+                mock.patch.object(utils, '_post_push', side_effect=results) as post:
+            statuses = utils.send_bulk_push([(list(tokens_by_user), 'Title', 'Body', None)])[0]
+        return statuses, [call.args[1] for call in post.call_args_list]
+
+    @override_settings(PUSHY_MAX_RECIPIENTS=1)
+    def test_partial_failure_across_chunks_is_retried(self):
+        statuses, requests = self.send({1: ['a1', 'a2']}, [utils.PUSH_SENT, utils.PUSH_RETRY])
+
+        self.assertEqual(requests, [['a1'], ['a2']])
+        self.assertEqual(statuses, {1: utils.PUSH_RETRY})
+
+    @override_settings(PUSHY_MAX_RECIPIENTS=2)
+    def test_chunks_follow_user_boundaries(self):
+        statuses, requests = self.send(
+            {1: ['a1'], 2: ['b1', 'b2'], 3: []}, [utils.PUSH_SENT, utils.PUSH_RETRY]
+        )
+
+        self.assertEqual(requests, [['a1'], ['b1', 'b2']])
+        self.assertEqual(statuses, {1: utils.PUSH_SENT, 2: utils.PUSH_RETRY, 3: utils.PUSH_SKIPPED})
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class NotificationInboxTests(TestCase):
+    """ترقيم keyset لصندوق الوارد وعدّاد غير المقروء."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x', first_name='A', last_name='B')
+        self.other = User.objects.create_user(email='other@example.com', password='x', first_name='C', last_name='D')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_pages_across_equal_created_at_break_ties_on_id(self):
+        created_at = timezone.now()
+        Notification.objects.bulk_create(
+            [Notification(user=self.user, title=f'n{i}', body='', created_at=created_at) for i in range(5)]
+            + [Notification(user=self.other, title='other', body='', created_at=created_at)]
+        )
+        expected = list(
+            Notification.objects.filter(user=self.user).order_by('-id').values_list('id', flat=True)
+        )
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            response = self.client.get('/api/notifications/inbox/', {'limit': 2, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            seen += [item['id'] for item in response.data['results']]
+            pages += 1
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+
+    def test_marking_read_twice_does_not_decrement_twice(self):
+        notifications = add_to_inbox([self.user.id], 'Title', 'Body') + add_to_inbox([self.user.id], 'Title', 'Body')
+        first = notifications[0].id
+
+        for _ in range(2):
+            response = self.client.post('/api/notifications/inbox/read/', {'ids': [first]}, format='json')
+        self.assertEqual(response.data, {"marked_read": 0, "unread": 1})
+
+        for _ in range(2):
+            response = self.client.post('/api/notifications/inbox/read/', {}, format='json')
+        self.assertEqual(response.data, {"marked_read": 0, "unread": 0})
+        self.assertEqual(self.client.get('/api/notifications/inbox/unread-count/').data, {"unread": 0})
+
+    def test_tampered_cursor_returns_400(self):
+        notification = add_to_inbox([self.user.id], 'Title', 'Body')[0]
+        valid = encode_cursor(notification)
+        tampered = [
+            'not a cursor',
+            base64.urlsafe_b64encode(b'garbage').decode(),
+            base64.urlsafe_b64encode(b'2026-01-01T00:00:00+00:00|x').decode(),
+            valid[:-4],
+        ]
+        for cursor in tampered:
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/notifications/inbox/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,85 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .models import PushToken
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_key(user_id):
+    return f"push_tokens:{user_id}"
+
+
+def get_tokens(user_ids):
+    """
+    رموز أجهزة المستخدمين: قاموس {user_id: [token, ...]} (قائمة فارغة لمن لا رموز له).
+
+    تُقرأ القوائم من ذاكرة Django المؤقتة بـ get_many، وما لم يوجد فيها يُجلب باستعلام
+    واحد ثم يُخزَّن (بما فيه القوائم الفارغة)، فلا يحتاج الإرسال المعتاد أي استعلام.
+    تُحذف القائمة من الذاكرة عند تسجيل رمز أو حذفه (invalidate_tokens)، وتنتهي بعد
+    PUSH_TOKEN_CACHE_TTL ثانية في كل الأحوال: مع الذاكرة المحلية الافتراضية (LocMemCache)
+    لا يصل الحذف إلى عمليات gunicorn الأخرى.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    keys = {_cache_key(user_id): user_id for user_id in user_ids}
+    cached = cache.get_many(keys)
+    tokens = {keys[key]: value for key, value in cached.items()}
+
+    missing = [user_id for user_id in user_ids if user_id not in tokens]
+    if missing:
+        loaded = {user_id: [] for user_id in missing}
+        for user_id, token in PushToken.objects.filter(user_id__in=missing).values_list('user_id', 'token'):
+            loaded[user_id].append(token)
+        cache.set_many(
+            {_cache_key(user_id): value for user_id, value in loaded.items()},
+            getattr(settings, 'PUSH_TOKEN_CACHE_TTL', 300)
+        )
+        tokens.update(loaded)
+    return tokens
+
+
+def invalidate_tokens(user_ids):
+    """يحذف قوائم رموز المستخدمين من الذاكرة المؤقتة بعد أي تغيير في رموزهم."""
+    cache.delete_many([_cache_key(user_id) for user_id in set(user_ids)])
+
+
+def record_delivery(tokens, failed):
+    """
+    يحدّث رموز طلب /push ناجح حسب info.failed في رد Pushy (الرموز التي تعذّر التسليم
+    إليها: تطبيق محذوف أو رمز منتهٍ). لا استعلام إذا لم يفشل أي رمز؛ وإلا failure_count + 1
+    للرموز الفاشلة (تحديث واحد بـ F()) ثم حذف ما بلغ منها PUSH_TOKEN_MAX_FAILURES.
+    يعيد عدد الرموز المحذوفة.
+    """
+    failed = set(failed or ()) & set(tokens)
+    if not failed:
+        return 0
+
+    PushToken.objects.filter(token__in=failed).update(
+        failure_count=F('failure_count') + 1, last_failure_at=timezone.now()
+    )
+    max_failures = getattr(settings, 'PUSH_TOKEN_MAX_FAILURES', 3)
+    deleted = _delete(PushToken.objects.filter(token__in=failed, failure_count__gte=max_failures))
+    if deleted:
+        logger.info(f"Deleted {deleted} push token(s) after {max_failures} failed deliveries.")
+    return deleted
+
+
+def prune_stale(days):
+    """يحذف الرموز التي لم يُعد تسجيلها (updated_at) منذ days يوماً. يعيد عدد المحذوف."""
+    cutoff = timezone.now() - timedelta(days=days)
+    return _delete(PushToken.objects.filter(updated_at__lt=cutoff))
+
+
+def _delete(queryset):
+    # أصحاب الرموز أولاً، لحذف قوائمهم من الذاكرة المؤقتة بعد الحذف
+    user_ids = set(queryset.values_list('user_id', flat=True))
+    if not user_ids:
+        return 0
+    deleted, _ = queryset.delete()
+    invalidate_tokens(user_ids)
+    return deleted
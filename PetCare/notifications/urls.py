@@ -1,7 +1,17 @@
 from django.urls import path
-from .views import RegisterPushTokenView
+from .views import (
+    RegisterPushTokenView,
+    NotificationInboxView,
+    UnreadNotificationCountView,
+    MarkNotificationsReadView,
+)
 
 urlpatterns = [
     # المسار: POST /api/notifications/register/
     path('register/', RegisterPushTokenView.as_view(), name='register_push_token'),
-]
\ No newline at end of file
+
+    # صندوق الوارد: GET /api/notifications/inbox/?cursor=...&limit=20
+    path('inbox/', NotificationInboxView.as_view(), name='notification_inbox'),
+    path('inbox/unread-count/', UnreadNotificationCountView.as_view(), name='notification_unread_count'),
+    path('inbox/read/', MarkNotificationsReadView.as_view(), name='notification_mark_read'),
+]
@@ -1,48 +1,65 @@
 import requests as pushy_http_client
 from django.conf import settings
-from account.models import User
-from .models import PushToken
+from .http import get_session, get_timeout
+from .tokens import get_tokens, record_delivery
 import logging
 
 # إعداد الـ Logger
 logger = logging.getLogger(__name__)
 
+# نتائج محاولة الإرسال (تستخدمها outbox لتقرر إعادة المحاولة)
+PUSH_SENT = 'sent'
+PUSH_SKIPPED = 'skipped'   # لا يوجد ما يُرسل (مستخدم محذوف أو بدون رموز أجهزة): لا فائدة من إعادة المحاولة
+PUSH_RETRY = 'retry'       # خطأ مؤقت (شبكة، مهلة، 5xx، 429): تُعاد المحاولة لاحقاً
+PUSH_FAILED = 'failed'     # رفض نهائي من Pushy (4xx) أو إعداد ناقص
+
+
 def send_pushy_notification(user_id, title, body, data={}):
     """
     يرسل إشعار Pushy إلى جميع رموز الأجهزة المسجلة لمستخدم معين.
     يستخدم مسار /push ويتضمن معالجة تفصيلية لخطأ 400.
     تم رفع مستوى تسجيل الأخطاء (Logging Level) إلى ERROR لضمان ظهور رسائل التشخيص.
+
+    يعيد True عند النجاح. لتفاصيل النتيجة (هل تفيد إعادة المحاولة؟) استخدم deliver_pushy_notification.
     """
-    
+    return deliver_pushy_notification(user_id, title, body, data) == PUSH_SENT
+
+
+def deliver_pushy_notification(user_id, title, body, data=None):
+    """
+    نفس send_pushy_notification لكن يعيد نتيجة المحاولة:
+    PUSH_SENT أو PUSH_SKIPPED أو PUSH_RETRY أو PUSH_FAILED.
+    """
+    data = data or {}
+
     # 1. التحقق من مفتاح API
     secret_key = settings.PUSHY_SECRET_KEY
     if not secret_key:
         logger.error("FATAL: PUSHY_SECRET_KEY is not set in settings. Pushy cannot function.")
-        return False
+        return PUSH_FAILED
         
-    # 2. الحصول على رموز الجهاز للمستخدم
+    # 2. الحصول على رموز الجهاز للمستخدم (من الذاكرة المؤقتة عادة، بدون استعلام)
     try:
-        user = User.objects.get(id=user_id)
-        # الحصول على قائمة بالرموز المميزة (Tokens)
-        tokens = list(user.push_tokens.values_list('token', flat=True)) 
-    except User.DoesNotExist:
-        # 🚨 تغيير مستوى السجل إلى WARNING لضمان ظهوره
-        logger.warning(f"User with ID {user_id} not found for push notification.")
-        return False
+        tokens = get_tokens([user_id])[user_id]
     except Exception as e:
         logger.error(f"FATAL: Error retrieving push tokens for user {user_id}: {e}")
-        return False
+        return PUSH_RETRY
 
     if not tokens:
-        # 🚨 تغيير مستوى السجل إلى ERROR لضمان ظهوره (تشخيص)
-        logger.error(f"DIAGNOSTIC: No push tokens found for user {user_id}. Cannot send notification. Check PushToken table.")
-        return False
+        logger.info(f"No push tokens found for user {user_id}; nothing to send.")
+        return PUSH_SKIPPED
 
-    # 🚨 التعديل الرئيسي: سجل الرموز التي تحاول استخدامها (نستخدم ERROR لضمان الظهور) 
-    # نطبع أول 5 رموز للمراجعة
-    logger.error(f"DIAGNOSTIC: Pushy attempting to send to tokens (first 5): {tokens[:5]} for user {user_id}. Total tokens: {len(tokens)}")
-    # --------------------------------------------------------
+    # لا تُكتب الرموز نفسها في السجلات: عددها يكفي للتشخيص
+    logger.debug(f"Sending push notification to {len(tokens)} device(s) for user {user_id}.")
 
+    return _post_push(secret_key, tokens, title, body, data, f"user {user_id}")
+
+
+def _post_push(secret_key, tokens, title, body, data, context):
+    """
+    طلب /push واحد إلى Pushy لقائمة رموز (tokens). context يصف المستلمين في السجلات.
+    يعيد PUSH_SENT أو PUSH_RETRY أو PUSH_FAILED.
+    """
     # 3. بناء حمولة الإشعار (Payload)
     payload = {
         "to": tokens,
@@ -62,7 +79,7 @@ def send_pushy_notification(user_id, title, body, data={}):
     }
 
     # 4. إرسال الطلب إلى Pushy API
-    pushy_url = "https://api.pushy.me/push"
+    pushy_url = getattr(settings, 'PUSHY_API_URL', "https://api.pushy.me/push")
     
     headers = {
         "Content-Type": "application/json",
@@ -72,12 +89,13 @@ def send_pushy_notification(user_id, title, body, data={}):
     }
 
     try:
-        response = pushy_http_client.post(
+        # جلسة مشتركة باتصالات دائمة: لا مصافحة TCP/TLS جديدة لكل إشعار
+        response = get_session().post(
             pushy_url, 
             json=payload, 
             headers=headers, 
             params=params, 
-            timeout=10
+            timeout=get_timeout()
         )
         
         # رفع خطأ لأكواد الحالة 4xx أو 5xx
@@ -86,13 +104,19 @@ def send_pushy_notification(user_id, title, body, data={}):
         # التأكد من نجاح الرد من Pushy
         response_data = response.json()
         if response_data.get('success', False):
-            logger.info(f"SUCCESS: Push notification sent successfully to {len(tokens)} devices for user {user_id}. Pushy ID: {response_data.get('id')}")
-            return True
+            logger.info(f"SUCCESS: Push notification sent successfully to {len(tokens)} devices for {context}. Pushy ID: {response_data.get('id')}")
+            # الرموز التي رفضها Pushy (info.failed) تُعلَّم وتُحذف بعد تكرار الفشل
+            try:
+                record_delivery(tokens, (response_data.get('info') or {}).get('failed'))
+            except Exception as e:
+                # الإشعار أُرسل فعلاً: لا نعيده بسبب خطأ في تحديث الرموز
+                logger.error(f"Updating push token failures for {context} failed: {e}")
+            return PUSH_SENT
         else:
             # يسجل أخطاء API المرتجعة داخل حمولة JSON (مثل No recipients)
             pushy_error = response_data.get('error', 'Unknown Pushy API Error')
-            logger.error(f"PUSHY API FAILED: Pushy API returned failure for user {user_id}. Error: {pushy_error}")
-            return False
+            logger.error(f"PUSHY API FAILED: Pushy API returned failure for {context}. Error: {pushy_error}")
+            return PUSH_FAILED
 
     except pushy_http_client.exceptions.HTTPError as http_err:
         # 🚨 يلتقط أخطاء HTTP مثل 400 (Bad Request)
@@ -106,14 +130,87 @@ def send_pushy_notification(user_id, title, body, data={}):
             error_details = http_err.response.text or "Malformed response."
             
         # تسجيل رسالة الخطأ التفصيلية
-        logger.error(f"PUSH ERROR HTTP (Status {status_code}) for user {user_id}. Details: {error_details}")
-        return False
+        logger.error(f"PUSH ERROR HTTP (Status {status_code}) for {context}. Details: {error_details}")
+        # أخطاء الخادم وتجاوز حد الطلبات مؤقتة، وبقية أخطاء 4xx رفض نهائي للطلب نفسه
+        return PUSH_RETRY if status_code >= 500 or status_code == 429 else PUSH_FAILED
 
     except pushy_http_client.exceptions.RequestException as e: 
         # 🚨 يلتقط أخطاء الاتصال العامة (DNS, Timeout, Connection Refused)
-        logger.error(f"PUSH CONNECTION FAILED (Network/Timeout) for user {user_id}. Error: {e}")
-        return False
+        logger.error(f"PUSH CONNECTION FAILED (Network/Timeout) for {context}. Error: {e}")
+        return PUSH_RETRY
     except Exception as e:
         # 🚨 أي خطأ غير متوقع
-        logger.error(f"UNEXPECTED ERROR during Pushy process for user {user_id}: {e}")
-        return False
\ No newline at end of file
+        logger.error(f"UNEXPECTED ERROR during Pushy process for {context}: {e}")
+        return PUSH_RETRY
+
+
+# عند توزّع رموز مستخدم على أكثر من دفعة (أكثر من PUSHY_MAX_RECIPIENTS جهازاً): فشل مؤقت في
+# إحداها يكفي لإعادة المحاولة، ولو تكرر الإشعار على الأجهزة التي وصلها
+_RESULT_PRIORITY = (PUSH_RETRY, PUSH_SENT, PUSH_FAILED, PUSH_SKIPPED)
+
+
+def _chunk_recipients(user_ids, tokens_by_user, max_recipients):
+    """
+    يقسم رموز المستخدمين إلى دفعات من max_recipients رمزاً على الأكثر دون تقسيم رموز
+    مستخدم واحد بين دفعتين (إلا إذا تجاوزت max_recipients وحدها)، فنتيجة كل دفعة هي نتيجة
+    كل من فيها. يعيد دفعات من (user_id, token).
+    """
+    chunk = []
+    for user_id in user_ids:
+        tokens = tokens_by_user.get(user_id, ())
+        if chunk and len(chunk) + len(tokens) > max_recipients:
+            yield chunk
+            chunk = []
+        for token in tokens:
+            chunk.append((user_id, token))
+            if len(chunk) == max_recipients:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def send_bulk_push(messages):
+    """
+    يرسل عدة إشعارات، كل منها إلى عدة مستخدمين، بأقل عدد من طلبات HTTP.
+
+    المدخلات:
+        messages: قائمة من (user_ids, title, body, data).
+
+    تُجلب رموز أجهزة كل المستخدمين في كل الرسائل معاً (get_tokens: استعلام واحد على الأكثر)، ثم يُرسل كل إشعار
+    في طلبات /push يحمل كل منها حتى PUSHY_MAX_RECIPIENTS رمزاً، فتصبح الكلفة
+    بعدد الدفعات لا بعدد المستخدمين.
+
+    يعيد قائمة بنفس ترتيب messages، كل عنصر قاموس {user_id: نتيجة} حيث النتيجة
+    إحدى PUSH_SENT أو PUSH_SKIPPED (لا رموز) أو PUSH_RETRY أو PUSH_FAILED.
+    """
+    messages = [
+        (list(dict.fromkeys(user_ids)), title, body, data or {})
+        for user_ids, title, body, data in messages
+    ]
+
+    secret_key = settings.PUSHY_SECRET_KEY
+    if not secret_key:
+        logger.error("FATAL: PUSHY_SECRET_KEY is not set in settings. Pushy cannot function.")
+        return [dict.fromkeys(user_ids, PUSH_FAILED) for user_ids, *_ in messages]
+
+    # رموز كل المستخدمين من الذاكرة المؤقتة، واستعلام واحد لمن ليسوا فيها
+    all_user_ids = {user_id for user_ids, *_ in messages for user_id in user_ids}
+    try:
+        tokens_by_user = get_tokens(all_user_ids)
+    except Exception as e:
+        logger.error(f"FATAL: Error retrieving push tokens for {len(all_user_ids)} users: {e}")
+        return [dict.fromkeys(user_ids, PUSH_RETRY) for user_ids, *_ in messages]
+
+    max_recipients = max(1, getattr(settings, 'PUSHY_MAX_RECIPIENTS', 1000))
+    results = []
+    for user_ids, title, body, data in messages:
+        statuses = dict.fromkeys(user_ids, PUSH_SKIPPED)
+        for chunk in _chunk_recipients(user_ids, tokens_by_user, max_recipients):
+            owners = {user_id for user_id, _ in chunk}
+            status = _post_push(secret_key, [token for _, token in chunk], title, body, data, f"{len(owners)} users")
+            for user_id in owners:
+                statuses[user_id] = min(statuses[user_id], status, key=_RESULT_PRIORITY.index)
+
+        results.append(statuses)
+    return results
@@ -1,7 +1,8 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from .serializers import PushTokenSerializer
+from .serializers import NotificationSerializer, PushTokenSerializer
+from .inbox import inbox_page, mark_read, unread_count
 
 class RegisterPushTokenView(APIView):
     """POST: لتسجيل أو تحديث رمز الجهاز (Push Token) للمستخدم الحالي."""
@@ -17,4 +18,50 @@ class RegisterPushTokenView(APIView):
                 status=status.HTTP_201_CREATED
             )
         
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class NotificationInboxView(APIView):
+    """
+    GET: صندوق وارد المستخدم الحالي، الأحدث أولاً.
+    ?limit= (20 افتراضياً، حتى 100) و ?cursor= من next_cursor في الرد السابق.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            limit = 20
+        try:
+            notifications, next_cursor = inbox_page(request.user, request.query_params.get('cursor'), limit)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "results": NotificationSerializer(notifications, many=True).data,
+            "next_cursor": next_cursor,
+        })
+
+
+class UnreadNotificationCountView(APIView):
+    """GET: عدد الإشعارات غير المقروءة للمستخدم الحالي."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"unread": unread_count(request.user)})
+
+
+class MarkNotificationsReadView(APIView):
+    """POST: تعليم الإشعارات كمقروءة: {"ids": [..]} لإشعارات محددة، أو بدون ids لكلها."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        ids = request.data.get('ids')
+        if ids is not None and (
+            not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)
+        ):
+            return Response({"error": "'ids' must be a list of notification ids."}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated = mark_read(request.user, ids)
+        return Response({"marked_read": updated, "unread": unread_count(request.user)})
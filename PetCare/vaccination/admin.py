@@ -1,3 +1,16 @@
 from django.contrib import admin
-from .models import Vaccination
+from .models import Vaccination, BoosterRule, VaccinationDue
 admin.site.register(Vaccination)
+
+
+@admin.register(BoosterRule)
+class BoosterRuleAdmin(admin.ModelAdmin):
+    # بعد تعديل القواعد: python manage.py rebuild_vaccination_due
+    list_display = ('vacc_key', 'pet_type', 'interval_days')
+    list_filter = ('pet_type',)
+
+
+@admin.register(VaccinationDue)
+class VaccinationDueAdmin(admin.ModelAdmin):
+    list_display = ('pet', 'vacc_name', 'last_date', 'next_due', 'reminder_sent_at')
+    raw_id_fields = ('pet',)
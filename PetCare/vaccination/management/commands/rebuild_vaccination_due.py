@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from vaccination.schedule import rebuild_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every pet's next vaccination due dates from the vaccination history and the "
+        "booster rules. Run once after deploying, and after editing booster rules."
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"{rows} next-dose row(s) up to date."))
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from vaccination.schedule import send_due_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Send one push reminder per pet owner for booster doses due within --days days (or overdue) "
+        "that have not been reminded yet. Run it daily (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help="Remind doses due within this many days (default: VACCINATION_REMINDER_DAYS)."
+        )
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else getattr(settings, 'VACCINATION_REMINDER_DAYS', 7)
+        doses, owners = send_due_reminders(days)
+        self.stdout.write(self.style.SUCCESS(f"Reminded {owners} owner(s) of {doses} due vaccination(s)."))
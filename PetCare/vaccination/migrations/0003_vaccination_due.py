@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0010_remove_pet_qr_code_image_alter_pet_qr_token_and_more'),
+        ('vaccination', '0002_alter_vaccination_vacc_certificate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoosterRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vacc_key', models.CharField(max_length=100)),
+                ('pet_type', models.CharField(blank=True, choices=[('Cat', 'Cat'), ('Dog', 'Dog')], default='', max_length=50)),
+                ('interval_days', models.PositiveIntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('vacc_key', 'pet_type'), name='unique_booster_rule')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VaccinationDue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vacc_key', models.CharField(max_length=100)),
+                ('vacc_name', models.CharField(max_length=100)),
+                ('last_date', models.DateField()),
+                ('next_due', models.DateField(db_index=True)),
+                ('reminder_sent_at', models.DateTimeField(blank=True, null=True)),
+                ('pet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vaccinations_due', to='pets.pet')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('pet', 'vacc_key'), name='unique_vaccination_due')],
+            },
+        ),
+    ]
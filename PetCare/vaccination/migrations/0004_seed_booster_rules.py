@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:40
+
+from django.db import migrations
+
+# فترات الجرعات المعززة الشائعة للحيوانات البالغة (بالأيام)؛ قابلة للتعديل من لوحة الإدارة
+DEFAULT_RULES = [
+    ('rabies', '', 365),
+    ('dhpp', 'Dog', 1095),
+    ('leptospirosis', 'Dog', 365),
+    ('bordetella', 'Dog', 365),
+    ('fvrcp', 'Cat', 1095),
+    ('felv', 'Cat', 365),
+]
+
+
+def seed_rules(apps, schema_editor):
+    BoosterRule = apps.get_model('vaccination', 'BoosterRule')
+    for vacc_key, pet_type, interval_days in DEFAULT_RULES:
+        BoosterRule.objects.get_or_create(
+            vacc_key=vacc_key, pet_type=pet_type, defaults={'interval_days': interval_days}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vaccination', '0003_vaccination_due'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_rules, migrations.RunPython.noop),
+    ]
@@ -11,3 +11,52 @@ class Vaccination(models.Model):
     def __str__(self):
         return f"{self.vacc_name} for {self.pet.pet_name}"
 
+
+
+def normalize_vaccine_name(name):
+    # "Rabies " و "rabies" لقاح واحد
+    return " ".join((name or "").split()).lower()
+
+
+class BoosterRule(models.Model):
+    """
+    فترة الجرعة التالية (بالأيام) لكل لقاح ونوع حيوان. pet_type فارغ = لكل الأنواع،
+    والقاعدة الخاصة بالنوع تتقدم عليه.
+    """
+    vacc_key = models.CharField(max_length=100)  # normalize_vaccine_name(اسم اللقاح)
+    pet_type = models.CharField(max_length=50, choices=Pet.TYPE_CHOICES, blank=True, default='')
+    interval_days = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vacc_key', 'pet_type'], name='unique_booster_rule'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.vacc_key = normalize_vaccine_name(self.vacc_key)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.vacc_key} ({self.pet_type or 'any'}): every {self.interval_days} days"
+
+
+class VaccinationDue(models.Model):
+    """
+    موعد الجرعة التالية لكل حيوان ولقاح، محسوب مسبقاً من آخر تطعيم وقاعدة BoosterRule
+    (vaccination/schedule.py) عند كل إنشاء أو تعديل أو حذف عبر VaccinationViewSet.
+    """
+    pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name="vaccinations_due")
+    vacc_key = models.CharField(max_length=100)
+    vacc_name = models.CharField(max_length=100)  # الاسم كما أُدخل في آخر تطعيم
+    last_date = models.DateField()
+    next_due = models.DateField(db_index=True)
+    # وقت إرسال تذكير next_due الحالي (None: لم يُرسل). يُصفَّر عند تغيّر next_due
+    reminder_sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['pet', 'vacc_key'], name='unique_vaccination_due'),
+        ]
+
+    def __str__(self):
+        return f"{self.vacc_name} for {self.pet.pet_name} due {self.next_due}"
@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from notifications.outbox import notify
+
+from .models import BoosterRule, Vaccination, VaccinationDue, normalize_vaccine_name
+
+
+def booster_interval(vacc_key, pet_type):
+    """فترة الجرعة التالية بالأيام للقاح ونوع الحيوان (أو None إن لم توجد قاعدة)."""
+    return (
+        BoosterRule.objects.filter(vacc_key=vacc_key, pet_type__in=[pet_type, ''])
+        .order_by('-pet_type')
+        .values_list('interval_days', flat=True)
+        .first()
+    )
+
+
+def refresh_due(pet, vacc_names):
+    """
+    يعيد حساب VaccinationDue للحيوان pet ولكل لقاح في vacc_names من آخر تطعيم مسجّل.
+    يُحذف الصف إذا لم يبق تطعيم أو لم توجد قاعدة للقاح. تغيّر next_due يصفّر التذكير.
+    """
+    # تطعيمات الحيوان الواحد قليلة: استعلام واحد ومطابقة الأسماء الموحّدة هنا
+    history = list(Vaccination.objects.filter(pet=pet).order_by('vacc_date', 'id').values_list('vacc_name', 'vacc_date'))
+    for vacc_key in {normalize_vaccine_name(name) for name in vacc_names}:
+        latest = next(
+            ((name, date) for name, date in reversed(history) if normalize_vaccine_name(name) == vacc_key),
+            None
+        )
+        interval = booster_interval(vacc_key, pet.pet_type) if latest else None
+        if interval is None:
+            VaccinationDue.objects.filter(pet=pet, vacc_key=vacc_key).delete()
+            continue
+
+        vacc_name, last_date = latest
+        next_due = last_date + timedelta(days=interval)
+        due, created = VaccinationDue.objects.get_or_create(
+            pet=pet, vacc_key=vacc_key,
+            defaults={'vacc_name': vacc_name, 'last_date': last_date, 'next_due': next_due}
+        )
+        if not created and (due.vacc_name, due.last_date, due.next_due) != (vacc_name, last_date, next_due):
+            if due.next_due != next_due:
+                due.reminder_sent_at = None
+            due.vacc_name, due.last_date, due.next_due = vacc_name, last_date, next_due
+            due.save(update_fields=['vacc_name', 'last_date', 'next_due', 'reminder_sent_at'])
+
+
+def rebuild_all():
+    """
+    يعيد بناء جدول VaccinationDue بالكامل (بعد تعديل قواعد BoosterRule أو لأول مرة).
+    يعيد عدد الصفوف الناتجة.
+    """
+    rules = {}
+    for vacc_key, pet_type, interval_days in BoosterRule.objects.values_list('vacc_key', 'pet_type', 'interval_days'):
+        rules[(vacc_key, pet_type)] = interval_days
+
+    latest = {}
+    rows = (
+        Vaccination.objects.values_list('pet_id', 'pet__pet_type', 'vacc_name')
+        .annotate(last_date=Max('vacc_date'))
+    )
+    for pet_id, pet_type, vacc_name, last_date in rows:
+        key = (pet_id, normalize_vaccine_name(vacc_name))
+        if key not in latest or last_date > latest[key][2]:
+            latest[key] = (pet_type, vacc_name, last_date)
+
+    existing = {
+        (due.pet_id, due.vacc_key): due for due in VaccinationDue.objects.all()
+    }
+    to_create, to_update, keep = [], [], set()
+    for (pet_id, vacc_key), (pet_type, vacc_name, last_date) in latest.items():
+        interval = rules.get((vacc_key, pet_type), rules.get((vacc_key, '')))
+        if interval is None:
+            continue
+        next_due = last_date + timedelta(days=interval)
+        keep.add((pet_id, vacc_key))
+        due = existing.get((pet_id, vacc_key))
+        if due is None:
+            to_create.append(VaccinationDue(
+                pet_id=pet_id, vacc_key=vacc_key, vacc_name=vacc_name, last_date=last_date, next_due=next_due
+            ))
+        elif (due.vacc_name, due.last_date, due.next_due) != (vacc_name, last_date, next_due):
+            if due.next_due != next_due:
+                due.reminder_sent_at = None
+            due.vacc_name, due.last_date, due.next_due = vacc_name, last_date, next_due
+            to_update.append(due)
+
+    with transaction.atomic():
+        VaccinationDue.objects.bulk_create(to_create, batch_size=500)
+        VaccinationDue.objects.bulk_update(
+            to_update, ['vacc_name', 'last_date', 'next_due', 'reminder_sent_at'], batch_size=500
+        )
+        stale = [due.id for key, due in existing.items() if key not in keep]
+        VaccinationDue.objects.filter(id__in=stale).delete()
+    return len(keep)
+
+
+def due_soon(days, today=None):
+    """
+    الجرعات المستحقة خلال days يوماً من اليوم، بما فيها المتأخرة (كما في الإجراء due):
+    تطعيم أُدخل بتاريخ قديم، أو قاعدة جديدة بعد rebuild_all، أو توقف أطول من النافذة.
+    """
+    today = today or timezone.localdate()
+    return VaccinationDue.objects.filter(next_due__lte=today + timedelta(days=days))
+
+
+def _describe(due, today):
+    if due.next_due < today:
+        return f"overdue since {due.next_due}"
+    return f"due on {due.next_due}"
+
+
+def _message(dues, today):
+    if len(dues) == 1:
+        due = dues[0]
+        return "Vaccination Reminder", f"{due.pet.pet_name}'s {due.vacc_name} booster is {_describe(due, today)}"
+    items = "; ".join(f"{due.pet.pet_name}: {due.vacc_name} {_describe(due, today)}" for due in dues)
+    return "Vaccination Reminders", f"You have {len(dues)} vaccinations due. {items}"
+
+
+def send_due_reminders(days, now=None):
+    """
+    يرسل تذكيراً واحداً لكل مالك بكل جرعاته المستحقة خلال days يوماً أو المتأخرة، ويعيد
+    (عدد الجرعات، عدد الإشعارات). الحجز بـ UPDATE شرطي على reminder_sent_at كما في
+    تذكير المواعيد، فلا يتكرر تذكير الجرعة نفسها.
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    with transaction.atomic():
+        ids = list(
+            due_soon(days, today).filter(reminder_sent_at__isnull=True).values_list('id', flat=True)
+        )
+        if not ids:
+            return 0, 0
+        VaccinationDue.objects.filter(id__in=ids, reminder_sent_at__isnull=True).update(reminder_sent_at=now)
+        claimed = (
+            VaccinationDue.objects.filter(id__in=ids, reminder_sent_at=now)
+            .select_related('pet')
+            .order_by('next_due')
+        )
+
+        by_owner = {}
+        for due in claimed:
+            by_owner.setdefault(due.pet.owner_id, []).append(due)
+
+        for owner_id, dues in by_owner.items():
+            title, body = _message(dues, today)
+            notify(owner_id, title, body, {
+                "action": "VACCINATION_REMINDER",
+                "pet_ids": sorted({due.pet_id for due in dues}),
+            })
+    return sum(len(d) for d in by_owner.values()), len(by_owner)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Vaccination
+from .models import Vaccination, VaccinationDue
 from pets.models import Pet
 
 class VaccinationSerializer(serializers.ModelSerializer):
@@ -13,3 +13,11 @@ class VaccinationSerializer(serializers.ModelSerializer):
             # إخفاء حقل 'pet' من الإدخال لكن إتاحته للعرض
             'pet': {'write_only': True}
         }
+
+
+class VaccinationDueSerializer(serializers.ModelSerializer):
+    pet_name = serializers.ReadOnlyField(source='pet.pet_name')
+
+    class Meta:
+        model = VaccinationDue
+        fields = ['pet', 'pet_name', 'vacc_name', 'last_date', 'next_due']
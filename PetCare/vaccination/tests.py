@@ -1,3 +1,116 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from account.models import User
+from pets.models import Pet
+
+from . import schedule
+from .models import BoosterRule, Vaccination, VaccinationDue
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class VaccinationDueUpdateTests(TestCase):
+    """تعديل التطعيم عبر VaccinationViewSet يعيد حساب VaccinationDue لموعده القديم والجديد."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x', first_name='A', last_name='B')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        BoosterRule.objects.update_or_create(vacc_key='rabies', pet_type='', defaults={'interval_days': 365})
+        self.cat = self.make_pet('Cat', 'cat')
+        self.dog = self.make_pet('Dog', 'dog')
+
+    def make_pet(self, pet_type, name):
+        return Pet.objects.create(
+            owner=self.user, pet_name=name, pet_type=pet_type, pet_color='Black', pet_gender='Male',
+            pet_birthday=date(2020, 1, 1), qr_token=name, qr_url=f'https://example.com/{name}'
+        )
+
+    def test_moving_vaccination_to_another_pet_moves_due(self):
+        vacc_date = timezone.localdate() - timedelta(days=360)
+        response = self.client.post(
+            f'/api/pets/{self.cat.id}/vaccinations/',
+            {'vacc_name': 'Rabies', 'vacc_date': vacc_date, 'pet': self.cat.id}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(VaccinationDue.objects.filter(pet=self.cat).exists())
+
+        response = self.client.patch(
+            f"/api/vaccinations/{response.data['id']}/", {'pet': self.dog.id}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(VaccinationDue.objects.filter(pet=self.cat).exists())
+        due = VaccinationDue.objects.get(pet=self.dog)
+        self.assertEqual(due.next_due, vacc_date + timedelta(days=365))
+        with mock.patch.object(schedule, 'notify') as notify:
+            self.assertEqual(schedule.send_due_reminders(30), (1, 1))
+        self.assertEqual(notify.call_args.args[3]['pet_ids'], [self.dog.id])
+
+
+class ScheduleTests(TestCase):
+    """refresh_due و rebuild_all و send_due_reminders على قواعد الجرعات المزروعة (rabies كل 365 يوماً)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x', first_name='A', last_name='B')
+        self.cat = Pet.objects.create(
+            owner=self.user, pet_name='cat', pet_type='Cat', pet_color='Black', pet_gender='Male',
+            pet_birthday=date(2020, 1, 1), qr_token='cat', qr_url='https://example.com/cat'
+        )
+        self.today = timezone.localdate()
+
+    def vaccinate(self, name, days_ago):
+        vaccination = Vaccination.objects.create(pet=self.cat, vacc_name=name, vacc_date=self.today - timedelta(days=days_ago))
+        schedule.refresh_due(self.cat, [name])
+        return vaccination
+
+    def test_refresh_due_follows_latest_vaccination(self):
+        self.vaccinate('Rabies', 700)
+        self.vaccinate(' rabies', 360)
+
+        due = VaccinationDue.objects.get(pet=self.cat, vacc_key='rabies')
+        self.assertEqual(due.vacc_name, ' rabies')
+        self.assertEqual(due.next_due, self.today + timedelta(days=5))
+
+    def test_refresh_due_resets_reminder_and_drops_row_without_history(self):
+        self.vaccinate('Rabies', 360)
+        VaccinationDue.objects.update(reminder_sent_at=timezone.now())
+
+        self.vaccinate('Rabies', 0)
+        self.assertIsNone(VaccinationDue.objects.get(pet=self.cat).reminder_sent_at)
+
+        Vaccination.objects.filter(pet=self.cat).delete()
+        schedule.refresh_due(self.cat, ['Rabies'])
+        self.assertFalse(VaccinationDue.objects.exists())
+
+    def test_rebuild_all_matches_refresh_due(self):
+        self.vaccinate('Rabies', 100)
+        self.vaccinate('FVRCP', 100)
+        self.vaccinate('Unknown vaccine', 100)
+        expected = set(VaccinationDue.objects.values_list('pet_id', 'vacc_key', 'next_due'))
+        BoosterRule.objects.filter(vacc_key='fvrcp').delete()
+        VaccinationDue.objects.filter(vacc_key='rabies').update(next_due=self.today)
+
+        self.assertEqual(schedule.rebuild_all(), 1)
+
+        self.assertEqual(
+            set(VaccinationDue.objects.values_list('pet_id', 'vacc_key', 'next_due')),
+            {row for row in expected if row[1] == 'rabies'}
+        )
+
+    def test_overdue_booster_is_reminded_once(self):
+        # أُدخل متأخراً: موعده مضى قبل أول تشغيل للتذكير
+        self.vaccinate('Rabies', 400)
+
+        with mock.patch.object(schedule, 'notify') as notify:
+            self.assertEqual(schedule.send_due_reminders(7), (1, 1))
+            self.assertEqual(schedule.send_due_reminders(7), (0, 0))
+
+        notify.assert_called_once()
+        owner_id, title, body, data = notify.call_args.args
+        self.assertEqual(owner_id, self.user.id)
+        self.assertIn(f"overdue since {self.today - timedelta(days=35)}", body)
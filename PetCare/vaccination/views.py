@@ -1,9 +1,14 @@
 from rest_framework import viewsets, permissions
-from .models import Vaccination
-from .serializers import VaccinationSerializer
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .models import Vaccination, VaccinationDue
+from .serializers import VaccinationSerializer, VaccinationDueSerializer
+from .schedule import refresh_due
 from rest_framework.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
 from pets.models import Pet  # يجب استيراد نموذج الحيوان الأليف
+from datetime import timedelta
+from django.utils import timezone
 
 class VaccinationViewSet(viewsets.ModelViewSet):
     serializer_class = VaccinationSerializer
@@ -31,4 +36,41 @@ class VaccinationViewSet(viewsets.ModelViewSet):
         pet = get_object_or_404(Pet, id=pet_id, owner=self.request.user)
             
         # 3. حفظ التطعيم الجديد وربطه بالحيوان
-        serializer.save(pet=pet)
\ No newline at end of file
+        serializer.save(pet=pet)
+        # 4. تحديث موعد الجرعة التالية لهذا اللقاح
+        refresh_due(pet, [serializer.instance.vacc_name])
+
+    def perform_update(self, serializer):
+        old_pet, old_name = serializer.instance.pet, serializer.instance.vacc_name
+        vaccination = serializer.save()
+        # تغيير الاسم أو الحيوان ينقل التطعيم: نعيد حساب موعده القديم والجديد
+        if old_pet.pk != vaccination.pet_id:
+            refresh_due(old_pet, [old_name])
+            refresh_due(vaccination.pet, [vaccination.vacc_name])
+        else:
+            refresh_due(vaccination.pet, [old_name, vaccination.vacc_name])
+
+    def perform_destroy(self, instance):
+        pet, vacc_name = instance.pet, instance.vacc_name
+        instance.delete()
+        refresh_due(pet, [vacc_name])
+
+    @action(detail=False, methods=['get'])
+    def due(self, request, *args, **kwargs):
+        """
+        الجرعات التالية لحيوانات المستخدم (أو للحيوان في الرابط) المستحقة خلال ?days=
+        يوماً (30 افتراضياً)، بما فيها المتأخرة، مرتبة حسب الموعد.
+        """
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            days = 30
+        queryset = VaccinationDue.objects.filter(
+            pet__owner=request.user,
+            next_due__lte=timezone.localdate() + timedelta(days=days)
+        ).select_related('pet').order_by('next_due')
+        pet_id = self.kwargs.get('pet_pk')
+        if pet_id:
+            get_object_or_404(Pet, id=pet_id, owner=request.user)
+            queryset = queryset.filter(pet_id=pet_id)
+        return Response(VaccinationDueSerializer(queryset, many=True).data)